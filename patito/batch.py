@@ -0,0 +1,430 @@
+"""Ejecución por lotes: corre un mismo programa sobre muchas entradas a la vez con NumPy.
+
+    gen = QuadGenerator(inputs=("n",))         # globales que llegan con valor desde fuera
+    quads = gen.analyze(parse_text(src))
+    bvm = BatchVM(quads, gen.funcs, gen.memory.const_table, gen.global_vars,
+                  unchecked=gen.init_report.proven, lines=gen.lineas)
+    res = bvm.run({"n": np.arange(10_000)})
+    res.outputs[i], res.errors.get(i), res.values["r"][i]
+
+Cada carril es una ejecución independiente. La memoria guarda un arreglo por dirección (las
+globales, un valor por carril; locales y temporales, uno por profundidad de llamada y carril) y
+cada cuádruplo se evalúa una sola vez para todos los carriles que están en él. Cada carril
+lleva su propio ip: en cada vuelta se ejecuta el bloque básico con el ip más bajo, con la
+máscara de los carriles que están ahí. Un GOTOF reparte la máscara y los carriles se vuelven a
+juntar cuando alcanzan el mismo bloque (al salir del si o del ciclo).
+
+Diferencias con VirtualMachine:
+  * los enteros son int64: no crecen sin límite;
+  * una variable que en algún carril recibe un flotante se guarda como flotante en todos;
+  * una lectura sin valor o una división entre cero detiene solo a su carril (queda en
+    `errors`, con la línea del fuente si se pasó `lines`);
+  * 'paralelo' corre en secuencia dentro de cada carril.
+"""
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:    # dependencia opcional: solo la necesita este modo
+    np = None
+
+from cfg import leaders
+from semantico import VirtualMemory, SemanticError, ENTERO, FLOTANTE
+
+
+@dataclass
+class BatchResult:
+    lanes: int
+    outputs: list                                  # salida de cada carril
+    errors: dict = field(default_factory=dict)     # carril -> SemanticError
+    values: dict = field(default_factory=dict)     # global -> arreglo con su valor final por carril
+    steps: int = 0          # cuádruplos despachados (una vez por grupo de carriles)
+    lane_steps: int = 0     # cuádruplos ejecutados sumando todos los carriles
+    max_depth: int = 0
+
+
+def _dtype(value):
+    if isinstance(value, np.ndarray):
+        return value.dtype
+    if isinstance(value, str):
+        return np.dtype(object)
+    return np.asarray(value).dtype
+
+
+class BatchVM:
+    INITIAL_DEPTH = 8   # profundidades de llamada reservadas; se duplica al llenarse
+    _DTYPES = {ENTERO: "int64", FLOTANTE: "float64"}
+
+    def __init__(self, cuadruplos, func_dir, const_table, global_vars=None, unchecked=False, lines=None):
+        if np is None:
+            raise SemanticError("La ejecución por lotes necesita NumPy (pip install numpy)")
+        self.cuadruplos = cuadruplos
+        self.func_dir = func_dir
+        self.global_vars = global_vars
+        self.lines = lines
+        # unchecked: el análisis de inicialización probó que toda lectura tiene valor, así que
+        # no se lleva la máscara de qué carriles asignaron cada dirección
+        self.unchecked = unchecked
+        self.const_mem = {addr: val for (val, _), addr in const_table.items()}
+        self._ends = [0] * len(cuadruplos)
+        starts = leaders(cuadruplos, func_dir)
+        for a, b in zip(starts, starts[1:] + [len(cuadruplos)]):
+            self._ends[a:b] = [b] * (b - a)
+        self.G, self.F = {}, {}        # dirección -> arreglo (N,) / (profundidad, N)
+        self.GV, self.FV = {}, {}      # lo mismo, con qué carriles tienen valor
+        self._code = [self._decode(i, q) for i, q in enumerate(cuadruplos)]
+
+    # -- ejecución -----------------------------------------------------------
+    def run(self, inputs=None, lanes=None):
+        """Corre el programa en cada carril; `inputs` mapea nombre (o dirección) global -> valores."""
+        self._setup(inputs or {}, lanes)
+        code, ends, n = self._code, self._ends, len(self._code)
+        pc = self.pc
+        steps = lane_steps = 0
+        while True:
+            ip = int(pc.min())
+            if ip >= n:
+                break
+            self._select(np.flatnonzero(pc == ip))
+            end = ends[ip]
+            for i in range(ip, end):
+                steps += 1
+                lane_steps += self._k
+                if code[i](i):         # el cuádruplo ya movió los ip de sus carriles
+                    break
+                if not self._k:        # todos los carriles del bloque fallaron
+                    break
+            else:
+                pc[self._lanes] = end
+        values = {}
+        if self.global_vars is not None:
+            for name, vinfo in self.global_vars.by_name.items():
+                if vinfo.addr in self.G:
+                    values[name] = self.G[vinfo.addr].copy()
+        return BatchResult(self.n, self._outputs(), dict(sorted(self._errors.items())), values,
+                           steps, lane_steps, self.max_depth)
+
+    def _setup(self, inputs, lanes):
+        arrays = {}
+        for key, value in inputs.items():
+            vinfo = self.global_vars.lookup(key) if isinstance(key, str) and self.global_vars else None
+            if isinstance(key, str) and vinfo is None:
+                raise SemanticError(f"Variable global '{key}' no encontrada")
+            dtype = self._DTYPES.get(vinfo.vtype) if vinfo else None
+            arrays[key] = (vinfo.addr if vinfo else key, np.asarray(value, dtype))
+        if lanes is None:
+            lanes = max((a.shape[0] for _, a in arrays.values() if a.ndim), default=1)
+        self.n = lanes
+        for mem in (self.G, self.F, self.GV, self.FV):
+            mem.clear()
+        for key, (addr, a) in arrays.items():
+            if a.ndim > 1:
+                raise SemanticError(f"Entrada '{key}': se esperaba un valor o un vector")
+            if a.ndim == 1 and a.shape[0] != lanes:
+                raise SemanticError(f"Entrada '{key}' tiene {a.shape[0]} valores; se esperaban {lanes}")
+            self.G[addr] = np.array(np.broadcast_to(a, (lanes,)))
+            if not self.unchecked:
+                self.GV[addr] = np.ones(lanes, bool)
+        self.cap = self.INITIAL_DEPTH
+        self.pc = np.zeros(lanes, np.int64)
+        self.sp = np.zeros(lanes, np.int64)
+        self.ret = np.zeros((self.cap, lanes), np.int64)
+        self.max_depth = 0
+        self._errors = {}
+        self._prints = []
+        self._keep = None
+
+    def _select(self, lanes):
+        # índices de los carriles activos en cada segmento; si todos están a la misma
+        # profundidad las locales se leen de un solo renglón
+        self._lanes = lanes
+        self._k = k = len(lanes)
+        idx = slice(None) if k == self.n else lanes
+        self._gidx = idx
+        spm = self.sp[idx]
+        lo = int(spm.min()) if k else 0
+        if not k or lo == spm.max():
+            self._depth = lo
+            self._fidx, self._pidx = (lo, idx), (lo + 1, idx)
+        else:
+            self._depth = None
+            self._fidx, self._pidx = (spm, lanes), (spm + 1, lanes)
+
+    # -- errores por carril --------------------------------------------------
+    def _fail(self, bad, msg):
+        """Detiene los carriles marcados en `bad` (máscara sobre los activos) con `msg`."""
+        lanes = self._lanes[bad]
+        ip = self._ip
+        linea = self.lines[ip] if self.lines is not None and ip < len(self.lines) else 0
+        for lane in lanes.tolist():
+            if lane not in self._errors:
+                err = SemanticError(f"{msg} (línea {linea})" if linea else msg)
+                err.linea, err.ip = linea, ip
+                self._errors[lane] = err
+        self.pc[lanes] = len(self._code)
+        keep = ~bad
+        self._keep = keep if self._keep is None else self._keep & keep
+
+    def _prune(self, *values):
+        # quita de los operandos ya leídos los carriles que acaban de fallar
+        keep, self._keep = self._keep, None
+        self._select(self._lanes[keep])
+        return [v[keep] if isinstance(v, np.ndarray) else v for v in values]
+
+    # -- memoria -------------------------------------------------------------
+    def _segment(self, addr):
+        for name, types in VirtualMemory.BASES.items():
+            for base in types.values():
+                if base <= addr < base + VirtualMemory.SPAN:
+                    return name
+        raise SemanticError(f"Dirección virtual fuera de rango: {addr}")
+
+    def _reader(self, addr):
+        seg = self._segment(addr)
+        if seg == "const":
+            value = self.const_mem[addr]
+            return lambda: value
+        glob = seg == "global"
+        mem, valid = (self.G, self.GV) if glob else (self.F, self.FV)
+        checked = not self.unchecked
+        msg = f"Acceso a dirección sin valor {addr}"
+
+        def read():
+            idx = self._gidx if glob else self._fidx
+            a = mem.get(addr)
+            if a is None:
+                self._fail(np.ones(self._k, bool), msg)
+                return np.zeros(self._k)
+            if checked:
+                ok = valid[addr][idx]
+                if not ok.all():
+                    self._fail(~ok, msg)
+            return a[idx]
+        return read
+
+    def _writer(self, addr, pending=False):
+        glob = self._segment(addr) == "global"
+        mem, valid = (self.G, self.GV) if glob else (self.F, self.FV)
+        checked = not self.unchecked
+
+        def write(value):
+            idx = self._gidx if glob else (self._pidx if pending else self._fidx)
+            a = mem.get(addr)
+            dt = _dtype(value)
+            if a is None:
+                shape = (self.n,) if glob else (self.cap, self.n)
+                a = mem[addr] = np.zeros(shape, dt)
+                if checked:
+                    valid[addr] = np.zeros(shape, bool)
+            elif a.dtype != dt:
+                wide = np.promote_types(a.dtype, dt)
+                if wide != a.dtype:
+                    a = mem[addr] = a.astype(wide)
+            a[idx] = value
+            if checked:
+                valid[addr][idx] = True
+        return write
+
+    def _grow(self, depth):
+        while depth >= self.cap:
+            self.cap *= 2
+            for mem in (self.F, self.FV):
+                for addr, a in mem.items():
+                    wide = np.zeros((self.cap, self.n), a.dtype)
+                    wide[:a.shape[0]] = a
+                    mem[addr] = wide
+            wide = np.zeros((self.cap, self.n), np.int64)
+            wide[:self.ret.shape[0]] = self.ret
+            self.ret = wide
+
+    # -- decodificación ------------------------------------------------------
+    _BINARY = {"+": lambda a, b: a + b, "-": lambda a, b: a - b, "*": lambda a, b: a * b,
+               "<": lambda a, b: a < b, ">": lambda a, b: a > b, "<=": lambda a, b: a <= b,
+               ">=": lambda a, b: a >= b, "==": lambda a, b: a == b, "!=": lambda a, b: a != b}
+
+    def _decode(self, i, quad):
+        """Traduce el cuádruplo a una función sin argumentos más que su ip; regresa True si movió los ip."""
+        op, l, r, res = quad
+        if op in ("+", "-") and r is None:
+            return self._unary(op, self._reader(l), self._writer(res))
+        if op in self._BINARY:
+            return self._binary(self._BINARY[op], self._reader(l), self._reader(r), self._writer(res))
+        if op == "/":
+            return self._division(self._reader(l), self._reader(r), self._writer(res))
+        if op == "=":
+            return self._unary("+", self._reader(l), self._writer(res))
+        if op == "PRINT":
+            return self._print(self._reader(l))
+        if op == "GOTO":
+            return self._goto(res)
+        if op == "GOTOF":
+            return self._gotof(self._reader(l), res)
+        if op == "ERA":
+            return self._era(l)
+        if op == "PARAM":
+            return self._param(self._reader(l), res)
+        if op in ("GOSUB", "TAILCALL"):
+            # los cuádruplos tras un TAILCALL siguen siendo la continuación correcta de la llamada
+            return self._gosub(l)
+        if op == "RET":
+            return self._ret(self._reader(l) if l is not None else None,
+                             self._writer(res) if res is not None else None)
+        if op == "ENDFUNC":
+            return self._return
+        if op == "PAR":
+            return lambda i: False
+        raise SemanticError(f"Operador de VM desconocido: {op}")
+
+    def _unary(self, op, read, write):
+        def h(i):
+            self._ip = i
+            v = read()
+            if self._keep is not None:
+                v, = self._prune(v)
+            write(-v if op == "-" else v)
+        return h
+
+    def _binary(self, fn, read_l, read_r, write):
+        def h(i):
+            self._ip = i
+            a, b = read_l(), read_r()
+            if self._keep is not None:
+                a, b = self._prune(a, b)
+            write(fn(a, b))
+        return h
+
+    def _division(self, read_l, read_r, write):
+        def h(i):
+            self._ip = i
+            a, b = read_l(), read_r()
+            zero = b == 0
+            if isinstance(zero, np.ndarray):
+                if zero.any():
+                    self._fail(zero, "División entre cero")
+            elif zero:
+                self._fail(np.ones(self._k, bool), "División entre cero")
+            if self._keep is not None:
+                a, b = self._prune(a, b)
+            if self._k:
+                write(a / b)
+        return h
+
+    def _print(self, read):
+        def h(i):
+            self._ip = i
+            v = read()
+            if self._keep is not None:
+                v, = self._prune(v)
+            self._prints.append((self._lanes, v.copy() if isinstance(v, np.ndarray) else v))
+        return h
+
+    def _goto(self, target):
+        def h(i):
+            self.pc[self._gidx] = target
+            return True
+        return h
+
+    def _gotof(self, read, target):
+        def h(i):
+            self._ip = i
+            c = read()
+            if self._keep is not None:
+                c, = self._prune(c)
+            self.pc[self._gidx] = np.where(c, i + 1, target)
+            return True
+        return h
+
+    def _era(self, name):
+        finfo = self.func_dir.get(name)
+
+        def h(i):
+            self._ip = i
+            self._pending = finfo
+            depth = self._depth if self._depth is not None else int(self.sp[self._lanes].max())
+            self._grow(depth + 1)
+            # el marco nuevo empieza vacío en esos carriles
+            for v in self.FV.values():
+                v[self._pidx] = False
+        return h
+
+    def _param(self, read, index):
+        writers = {}
+
+        def h(i):
+            self._ip = i
+            finfo = self._pending
+            if finfo is None:
+                raise SemanticError("PARAM sin ERA")
+            if index >= len(finfo.params):
+                raise SemanticError(f"Índice de parámetro {index} inválido para '{finfo.name}'")
+            addr = finfo.params[index].addr
+            write = writers.get(addr)
+            if write is None:
+                write = writers[addr] = self._writer(addr, pending=True)
+            v = read()
+            if self._keep is not None:
+                v, = self._prune(v)
+            write(v)
+        return h
+
+    def _gosub(self, name):
+        finfo = self.func_dir.get(name)
+        if not finfo or finfo.start_quad is None:
+            raise SemanticError(f"Función '{name}' sin punto de entrada")
+
+        def h(i):
+            depth = 1 + (self._depth if self._depth is not None else int(self.sp[self._lanes].max()))
+            self.ret[self._pidx] = i + 1
+            self.sp[self._gidx] += 1
+            self.pc[self._gidx] = finfo.start_quad
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._pending = None
+            return True
+        return h
+
+    def _ret(self, read, write):
+        def h(i):
+            self._ip = i
+            if read is not None and write is not None:
+                v = read()
+                if self._keep is not None:
+                    v, = self._prune(v)
+                if not self._k:
+                    return True
+                write(v)
+            return self._return(i)
+        return h
+
+    def _return(self, i):
+        # en el nivel más externo regresar termina el programa, como en VirtualMachine
+        n = len(self._code)
+        if self._depth is not None:
+            d, idx = self._depth, self._gidx
+            if d == 0:
+                self.pc[idx] = n
+            else:
+                self.pc[idx] = self.ret[d, idx]
+                self.sp[idx] -= 1
+            return True
+        lanes = self._lanes
+        spm = self.sp[lanes]
+        top = spm == 0
+        self.pc[lanes[top]] = n
+        inner, depth = lanes[~top], spm[~top]
+        self.pc[inner] = self.ret[depth, inner]
+        self.sp[inner] -= 1
+        return True
+
+    # -- salida --------------------------------------------------------------
+    def _outputs(self):
+        out = [[] for _ in range(self.n)]
+        for lanes, v in self._prints:
+            if isinstance(v, np.ndarray) and v.ndim:
+                for lane, x in zip(lanes.tolist(), v.tolist()):
+                    out[lane].append(f"{x}\n")
+            else:
+                s = f"{v.item() if isinstance(v, np.generic) else v}\n"
+                for lane in lanes.tolist():
+                    out[lane].append(s)
+        return ["".join(o) for o in out]
@@ -0,0 +1,200 @@
+"""Benchmarks de Patito: mide por separado scanner, parser, semántico/cuádruplos y VM.
+
+Uso (desde patito/):
+    python benchmarks/bench.py                       # corre todo y guarda benchmarks/resultados.json
+    python benchmarks/bench.py -k recursion -r 5     # solo cargas que contengan 'recursion'
+    python benchmarks/bench.py --baseline benchmarks/baseline.json
+    python benchmarks/bench.py --guardar-baseline    # actualiza benchmarks/baseline.json
+    python benchmarks/bench.py --compacto            # scanner con TokenBuffer (scanner.scan)
+
+Con --baseline se marca como regresión cualquier fase cuyo mejor tiempo supere al del
+baseline por más de --tolerancia (por defecto 10%); en ese caso el proceso sale con 1.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(AQUI))
+
+from scanner import build_lexer, tokenize, TokenReplay, TokenBuffer, scan
+from parser import build_parser
+from semantico import QuadGenerator
+from vm import VirtualMachine
+from generador import generar, profundo
+
+FASES = ("scanner", "parser", "semantico", "vm")
+
+
+def cargas():
+    out = {}
+    for fname in sorted(os.listdir(AQUI)):
+        if fname.endswith(".pato"):
+            with open(os.path.join(AQUI, fname), encoding="utf-8") as f:
+                out[fname[:-5]] = f.read()
+    # fuente larga (~10k líneas) pero barata de ejecutar: mide sobre todo el front-end
+    out["fuente_grande"] = generar(funciones=60, estatutos=25, semilla=26)
+    # pocas funciones llamadas y muchas que nadie llama: mide cuánto cuesta el código muerto
+    out["biblioteca"] = generar(funciones=5, sin_usar=200, estatutos=25, semilla=44)
+    # expresiones de 100k términos y estatutos muy anidados: sin límite de recursión
+    out["expresion_larga"] = profundo(terminos=100_000, anidamiento=0)
+    out["anidamiento"] = profundo(terminos=10, anidamiento=1_000)
+    return out
+
+
+def _escanear(src, compacto):
+    # lista de LexToken de PLY, o TokenBuffer con --compacto
+    return scan(src) if compacto else tokenize(src, build_lexer())
+
+
+def _lexer_de(toks):
+    return toks.lexer() if isinstance(toks, TokenBuffer) else TokenReplay(toks)
+
+
+def _fases(src, parser, compacto=False):
+    """Ejecuta una vez cada fase y regresa (tiempos, métricas)."""
+    tiempos = {}
+    t0 = time.perf_counter()
+    toks = _escanear(src, compacto)
+    tiempos["scanner"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ast = parser.parse(src, lexer=_lexer_de(toks))
+    tiempos["parser"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    gen = QuadGenerator()
+    quads = gen.analyze(ast)
+    tiempos["semantico"] = time.perf_counter() - t0
+
+    vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, unchecked=gen.init_report.proven, blocks=True)
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        t0 = time.perf_counter()
+        vm.run()
+        tiempos["vm"] = time.perf_counter() - t0
+    metricas = {
+        "lineas": src.count("\n"),
+        "tokens": len(toks),
+        "cuadruplos": len(quads),
+        "ejecutados": vm.steps,
+    }
+    return tiempos, metricas
+
+
+def _memoria_pico(src, parser, compacto=False):
+    """Pico de memoria (KiB) por fase con tracemalloc; se corre aparte para no sesgar tiempos."""
+    picos = {}
+
+    def medir(nombre, fn):
+        tracemalloc.start()
+        try:
+            res = fn()
+            picos[nombre] = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+        return res
+
+    toks = medir("scanner", lambda: _escanear(src, compacto))
+    ast = medir("parser", lambda: parser.parse(src, lexer=_lexer_de(toks)))
+    gen = QuadGenerator()
+    quads = medir("semantico", lambda: gen.analyze(ast))
+    vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, unchecked=gen.init_report.proven, blocks=True)
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        medir("vm", vm.run)
+    return picos
+
+
+def medir_carga(src, repeticiones, parser, compacto=False):
+    mejores = {f: float("inf") for f in FASES}
+    metricas = {}
+    for _ in range(repeticiones):
+        gc.collect()
+        tiempos, metricas = _fases(src, parser, compacto)
+        for f in FASES:
+            mejores[f] = min(mejores[f], tiempos[f])
+    res = dict(metricas)
+    res["tiempo_s"] = mejores
+    res["cuadruplos_por_s"] = {
+        "semantico": metricas["cuadruplos"] / mejores["semantico"] if mejores["semantico"] else None,
+        "vm": metricas["ejecutados"] / mejores["vm"] if mejores["vm"] else None,
+    }
+    res["memoria_pico_kib"] = _memoria_pico(src, parser, compacto)
+    return res
+
+
+def comparar(actual, baseline, tolerancia):
+    """Regresa la lista de regresiones (carga, fase, actual, baseline)."""
+    regresiones = []
+    for nombre, res in actual["cargas"].items():
+        base = baseline.get("cargas", {}).get(nombre)
+        if not base:
+            continue
+        for fase in FASES:
+            t, tb = res["tiempo_s"][fase], base["tiempo_s"].get(fase)
+            if tb and t > tb * (1 + tolerancia):
+                regresiones.append((nombre, fase, t, tb))
+    return regresiones
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("-k", dest="filtro", default="", help="solo cargas cuyo nombre contenga este texto")
+    ap.add_argument("-r", "--repeticiones", type=int, default=3)
+    ap.add_argument("-o", "--salida", default=os.path.join(AQUI, "resultados.json"))
+    ap.add_argument("--baseline", help="JSON previo contra el cual comparar")
+    ap.add_argument("--guardar-baseline", action="store_true", help="escribe los resultados en benchmarks/baseline.json")
+    ap.add_argument("--tolerancia", type=float, default=0.10)
+    ap.add_argument("--compacto", action="store_true", help="scanner con TokenBuffer en vez de LexToken de PLY")
+    args = ap.parse_args(argv)
+
+    parser = build_parser()
+    resultados = {
+        "meta": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeticiones": args.repeticiones,
+            "scanner": "compacto" if args.compacto else "ply",
+        },
+        "cargas": {},
+    }
+    print(f"{'carga':<16}{'scanner':>10}{'parser':>10}{'semantico':>11}{'vm':>10}{'quads/s vm':>13}{'pico KiB':>10}")
+    for nombre, src in cargas().items():
+        if args.filtro not in nombre:
+            continue
+        res = medir_carga(src, args.repeticiones, parser, args.compacto)
+        resultados["cargas"][nombre] = res
+        t = res["tiempo_s"]
+        qps = res["cuadruplos_por_s"]["vm"] or 0
+        pico = max(res["memoria_pico_kib"].values())
+        print(f"{nombre:<16}{t['scanner']:>10.4f}{t['parser']:>10.4f}{t['semantico']:>11.4f}{t['vm']:>10.4f}{qps:>13.0f}{pico:>10.0f}")
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2)
+    print(f"\nResultados en {args.salida}")
+    if args.guardar_baseline:
+        destino = os.path.join(AQUI, "baseline.json")
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Baseline actualizado en {destino}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        for nombre, fase, t, tb in regresiones:
+            print(f"REGRESION {nombre}/{fase}: {t:.4f}s vs {tb:.4f}s (+{(t / tb - 1) * 100:.1f}%)")
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto al baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+"""Generador de programas Patito sintéticos, válidos y semánticamente correctos.
+
+Sirve para medir cómo escalan scanner, parser, cuádruplos y VM con programas mucho más
+grandes que los de ejemplos/. Uso (desde patito/):
+
+    python benchmarks/generador.py -f 200 -e 20 -n 2 -o /tmp/grande.pato
+    python run_cuadruplos.py --run -q --stats /tmp/grande.pato
+
+Reglas que garantizan que el programa compile y termine:
+  * el grafo de llamadas es un árbol (f_k llama a f_{k*F+1} .. f_{k*F+F}) y las llamadas
+    solo aparecen al nivel superior de un cuerpo, así que cada función se ejecuta una vez;
+  * cada `mientras` usa su propio contador c<nivel> y hace --iteraciones vueltas;
+  * las expresiones enteras solo leen constantes, parámetros y contadores activos (las
+    variables enteras se usan en condiciones y expresiones flotantes), así los enteros
+    no crecen sin límite; los flotantes sí pueden crecer mucho (1e87 con -f 20 -n 4 -x 6,
+    hasta inf con más), pero solo se divide entre constantes distintas de cero;
+  * las funciones con variables locales abren con un `si` que las inicializa en ambas
+    ramas: la gramática no acepta una asignación justo después de `vars`;
+  * sin variables que declarar (--enteros 0 --flotantes 0 -n 0) no se emite `vars:`, que
+    la gramática no acepta vacío.
+"""
+import argparse
+import random
+import sys
+
+
+class Generador:
+    def __init__(self, funciones=10, estatutos=10, anidamiento=2, prof_expr=3,
+                 enteros=4, flotantes=2, fanout=2, iteraciones=3, estatutos_bloque=3,
+                 locales=True, sin_usar=0, semilla=0):
+        self.funciones = funciones
+        # funciones de "biblioteca" que nadie llama (u0, u1, ...): miden el costo del código muerto
+        self.sin_usar = sin_usar
+        self.estatutos = estatutos
+        self.anidamiento = anidamiento
+        self.prof_expr = prof_expr
+        self.enteros = enteros
+        self.flotantes = flotantes
+        self.fanout = fanout
+        self.iteraciones = iteraciones
+        self.estatutos_bloque = estatutos_bloque
+        # las locales necesitan el `si` inicial, que cuenta como un nivel de anidamiento
+        self.locales = locales and anidamiento > 0 and enteros + flotantes > 0
+        self.rnd = random.Random(semilla)
+
+    # -- nombres -----------------------------------------------------------
+    def _ents(self, en_func):
+        g = [f"g{i}" for i in range(self.enteros)]
+        return g + ([f"l{i}" for i in range(self.enteros)] if en_func and self.locales else [])
+
+    def _flots(self, en_func):
+        h = [f"h{i}" for i in range(self.flotantes)]
+        return h + ([f"m{i}" for i in range(self.flotantes)] if en_func and self.locales else [])
+
+    def _hijos(self, k):
+        if self.fanout <= 0:
+            return []
+        return [j for j in range(k * self.fanout + 1, k * self.fanout + self.fanout + 1) if j < self.funciones]
+
+    def _raices(self):
+        if self.fanout <= 0:
+            return list(range(self.funciones))
+        return [0] if self.funciones else []
+
+    # -- expresiones -------------------------------------------------------
+    def _hoja_ent(self, ctx):
+        fuentes = ctx["params"] + ctx["contadores"]
+        if fuentes and self.rnd.random() < 0.6:
+            return self.rnd.choice(fuentes)
+        return str(self.rnd.randint(0, 9))
+
+    def _expr_ent(self, ctx, prof):
+        if prof <= 0 or self.rnd.random() < 0.2:
+            return self._hoja_ent(ctx)
+        op = self.rnd.choice("+-*")
+        if op == "*":
+            return f"({self._expr_ent(ctx, prof - 1)} * {self.rnd.randint(1, 3)})"
+        return f"({self._expr_ent(ctx, prof - 1)} {op} {self._expr_ent(ctx, prof - 1)})"
+
+    def _hoja_num(self, ctx):
+        r = self.rnd.random()
+        if r < 0.4 and ctx["flots"]:
+            return self.rnd.choice(ctx["flots"])
+        if r < 0.6 and ctx["ents"]:
+            return self.rnd.choice(ctx["ents"])
+        if r < 0.8:
+            return self._hoja_ent(ctx)
+        return f"{self.rnd.randint(0, 9)}.{self.rnd.randint(0, 99):02d}"
+
+    def _expr_num(self, ctx, prof):
+        if prof <= 0 or self.rnd.random() < 0.2:
+            return self._hoja_num(ctx)
+        op = self.rnd.choice("+-*/")
+        if op == "/":
+            return f"({self._expr_num(ctx, prof - 1)} / {self.rnd.randint(1, 9)}.5)"
+        return f"({self._expr_num(ctx, prof - 1)} {op} {self._expr_num(ctx, prof - 1)})"
+
+    def _condicion(self, ctx):
+        op = self.rnd.choice(["<", ">", "<=", ">=", "==", "!="])
+        return f"{self._expr_num(ctx, max(1, self.prof_expr - 1))} {op} {self._expr_num(ctx, 1)}"
+
+    # -- estatutos ---------------------------------------------------------
+    def _asigna(self, ctx, ind):
+        if ctx["flots"] and self.rnd.random() < 0.4:
+            # el sumando flotante asegura que la variable guarde un float: la VM no convierte
+            # entero -> flotante al asignar, y un entero dentro de h = h * h crecería sin límite
+            return [f"{ind}{self.rnd.choice(ctx['flots'])} = {self._expr_num(ctx, self.prof_expr)} + 0.5;"]
+        if ctx["ents"]:
+            return [f"{ind}{self.rnd.choice(ctx['ents'])} = {self._expr_ent(ctx, self.prof_expr)};"]
+        return []
+
+    def _bloque(self, ctx, ind, nivel, n):
+        out = []
+        for _ in range(n):
+            out.extend(self._estatuto(ctx, ind, nivel))
+        return out
+
+    def _estatuto(self, ctx, ind, nivel):
+        r = self.rnd.random()
+        if nivel < self.anidamiento and r < 0.15:
+            out = [f"{ind}si ({self._condicion(ctx)}) {{"]
+            out += self._bloque(ctx, ind + "  ", nivel + 1, self.estatutos_bloque)
+            out.append(f"{ind}}}")
+            out.append(f"{ind}sino {{")
+            out += self._bloque(ctx, ind + "  ", nivel + 1, self.estatutos_bloque)
+            out.append(f"{ind}}};")
+            return out
+        if nivel < self.anidamiento and r < 0.3:
+            c = f"c{nivel}"
+            interno = dict(ctx, contadores=ctx["contadores"] + [c])
+            out = [f"{ind}{c} = 0;", f"{ind}mientras ({c} < {self.iteraciones}) haz {{"]
+            out += self._bloque(interno, ind + "  ", nivel + 1, self.estatutos_bloque)
+            out.append(f"{ind}  {c} = {c} + 1;")
+            out.append(f"{ind}}};")
+            return out
+        return self._asigna(ctx, ind)
+
+    def _llamada(self, ctx, j):
+        args = ", ".join(self._hoja_ent(ctx) for _ in range(2))
+        destino = self.rnd.choice(ctx["ents"]) if ctx["ents"] else None
+        return f"{destino} = f{j}({args});" if destino else None
+
+    # -- programa ----------------------------------------------------------
+    def _funcion(self, k, usada=True):
+        ctx = {"params": ["p0", "p1"], "contadores": [], "ents": self._ents(True), "flots": self._flots(True)}
+        yield f"func {'f' if usada else 'u'}{k}(p0 : entero, p1 : entero) : entero"
+        if self.locales:
+            yield "vars:"
+            if self.enteros:
+                yield "  " + ", ".join(f"l{i}" for i in range(self.enteros)) + " : entero;"
+            if self.flotantes:
+                yield "  " + ", ".join(f"m{i}" for i in range(self.flotantes)) + " : flotante;"
+            init = [f"    l{i} = p{i % 2} + {i};" for i in range(self.enteros)]
+            init += [f"    m{i} = p{i % 2} * 0.5;" for i in range(self.flotantes)]
+            yield "  si (p0 >= 0) {"
+            yield from init
+            yield "  }"
+            yield "  sino {"
+            yield from init
+            yield "  };"
+        hijos = self._hijos(k) if usada else []
+        huecos = sorted(self.rnd.randint(0, self.estatutos) for _ in hijos)
+        for i in range(self.estatutos + 1):
+            while huecos and huecos[0] == i:
+                huecos.pop(0)
+                llamada = self._llamada(ctx, hijos.pop(0))
+                if llamada:
+                    yield "  " + llamada
+            if i < self.estatutos:
+                yield from self._estatuto(ctx, "  ", 0)
+        yield f"  ret {self._expr_ent(ctx, self.prof_expr)};"
+        yield "finf"
+        yield ""
+
+    def lineas(self):
+        yield "programa generado;"
+        if self.enteros or self.flotantes or self.anidamiento:
+            yield "vars:"
+        if self.enteros:
+            yield "  " + ", ".join(f"g{i}" for i in range(self.enteros)) + " : entero;"
+        if self.flotantes:
+            yield "  " + ", ".join(f"h{i}" for i in range(self.flotantes)) + " : flotante;"
+        if self.anidamiento:
+            yield "  " + ", ".join(f"c{i}" for i in range(self.anidamiento)) + " : entero;"
+        yield ""
+        # hijos antes que padres: cada llamada va a una función ya definida
+        for k in reversed(range(self.funciones)):
+            yield from self._funcion(k)
+        for k in range(self.sin_usar):
+            yield from self._funcion(k, usada=False)
+        ctx = {"params": [], "contadores": [], "ents": self._ents(False), "flots": self._flots(False)}
+        yield "inicio"
+        for i in range(self.enteros):
+            yield f"  g{i} = {i};"
+        for i in range(self.flotantes):
+            yield f"  h{i} = {i}.5;"
+        for j in self._raices():
+            llamada = self._llamada(ctx, j)
+            if llamada:
+                yield "  " + llamada
+        yield from self._bloque(ctx, "  ", 0, self.estatutos)
+        if ctx["ents"] or ctx["flots"]:
+            yield f"  escribe({', '.join(ctx['ents'] + ctx['flots'])});"
+        yield "fin"
+
+    def escribir(self, f):
+        n = 0
+        for linea in self.lineas():
+            f.write(linea)
+            f.write("\n")
+            n += 1
+        return n
+
+
+def generar(**kw):
+    """Regresa el programa completo como texto (para programas chicos o medianos)."""
+    return "\n".join(Generador(**kw).lineas()) + "\n"
+
+
+def profundo(terminos=100_000, anidamiento=1_000):
+    """Programa con expresiones de `terminos` términos (encadenados y entre paréntesis
+    anidados) y `si`/`mientras` anidados `anidamiento` niveles: mide que cuádruplos y
+    semántico no dependan del límite de recursión de Python."""
+    cadena = " + ".join(str(i % 7) for i in range(terminos))
+    parentesis = "(1 + " * (terminos // 2) + "1" + ")" * (terminos // 2)
+    lineas = ["programa profundo;", "vars: a, b, c : entero;", "inicio",
+              f"  a = {cadena};", f"  b = {parentesis};", "  c = 0;"]
+    if anidamiento:
+        lineas.append("  " + "si (c < 1) { " * anidamiento + "c = c + 1;" + " };" * anidamiento)
+        lineas.append("  " + "mientras (c < 2) haz { " * anidamiento + "c = c + 1;" + " };" * anidamiento)
+    lineas += ["  escribe(a, b, c);", "fin"]
+    return "\n".join(lineas) + "\n"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Genera programas Patito sintéticos.")
+    ap.add_argument("-f", "--funciones", type=int, default=10)
+    ap.add_argument("-e", "--estatutos", type=int, default=10, help="estatutos en el nivel superior de cada cuerpo")
+    ap.add_argument("-b", "--estatutos-bloque", type=int, default=3, help="estatutos dentro de cada si/mientras")
+    ap.add_argument("-n", "--anidamiento", type=int, default=2, help="profundidad máxima de si/mientras")
+    ap.add_argument("-x", "--prof-expr", type=int, default=3, help="profundidad de las expresiones")
+    ap.add_argument("--enteros", type=int, default=4, help="variables enteras (globales y locales)")
+    ap.add_argument("--flotantes", type=int, default=2, help="variables flotantes (globales y locales)")
+    ap.add_argument("--fanout", type=int, default=2, help="llamadas a otras funciones por cuerpo")
+    ap.add_argument("--iteraciones", type=int, default=3, help="vueltas de cada mientras")
+    ap.add_argument("--sin-locales", action="store_true", help="las funciones solo usan parámetros y globales")
+    ap.add_argument("--sin-usar", type=int, default=0, help="funciones extra que nadie llama")
+    ap.add_argument("-s", "--semilla", type=int, default=0)
+    ap.add_argument("-o", "--salida", help="archivo de salida (por defecto stdout)")
+    args = ap.parse_args(argv)
+    gen = Generador(
+        funciones=args.funciones, estatutos=args.estatutos, anidamiento=args.anidamiento,
+        prof_expr=args.prof_expr, enteros=args.enteros, flotantes=args.flotantes,
+        fanout=args.fanout, iteraciones=args.iteraciones, estatutos_bloque=args.estatutos_bloque,
+        locales=not args.sin_locales, sin_usar=args.sin_usar, semilla=args.semilla,
+    )
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            n = gen.escribir(f)
+        print(f"{n} líneas en {args.salida}", file=sys.stderr)
+    else:
+        gen.escribir(sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
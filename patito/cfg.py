@@ -0,0 +1,199 @@
+"""Grafo de flujo de control (CFG) sobre la lista de cuádruplos.
+
+Los bloques básicos se cortan en los destinos de GOTO/GOTOF, después de cada salto, después
+de cada GOSUB (la llamada termina el bloque; la continuación es su sucesor) y después de
+RET/ENDFUNC/TAILCALL. Las aristas son intraprocedurales: la llamada queda anotada en `call`;
+un TAILCALL es a la vez llamada y salida.
+
+    cfg = CFG(quads, gen.funcs)
+    for blk in cfg.region(cfg.main_entry):
+        ...
+    idom = cfg.dominators(cfg.main_entry)
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Optional
+
+JUMPS = ('GOTO', 'GOTOF')
+EXITS = ('RET', 'ENDFUNC')
+CALLS = ('GOSUB',)
+TAILCALLS = ('TAILCALL',)
+# PAR puede saltar directo al final del ciclo (ya ejecutado en otros procesos); para el
+# flujo de datos equivale a seguir de largo, pero termina el bloque para la VM.
+PARALLEL = ('PAR',)
+
+
+@dataclass
+class BasicBlock:
+    start: int
+    end: int                       # exclusivo
+    succs: list = field(default_factory=list)
+    preds: list = field(default_factory=list)
+    call: Optional[str] = None     # función que llama el GOSUB/TAILCALL con que termina el bloque
+    exit: bool = False             # termina en RET/ENDFUNC/TAILCALL
+
+    def __len__(self):
+        return self.end - self.start
+
+
+def leaders(quads, funcs=None):
+    n = len(quads)
+    out = {0}
+    if funcs is not None:
+        for f in funcs.all():
+            if f.start_quad is not None:
+                out.add(f.start_quad)
+    for i, (op, _, _, res) in enumerate(quads):
+        if op in JUMPS:
+            out.add(res)
+            out.add(i + 1)
+        elif op in EXITS or op in CALLS or op in TAILCALLS or op in PARALLEL:
+            out.add(i + 1)
+    return sorted(x for x in out if x < n)
+
+
+class CFG:
+    def __init__(self, quads, funcs=None):
+        self.quads = quads
+        self.funcs = funcs
+        self.starts = leaders(quads, funcs)
+        self.blocks = {}
+        n = len(quads)
+        for k, start in enumerate(self.starts):
+            end = self.starts[k + 1] if k + 1 < len(self.starts) else n
+            blk = BasicBlock(start, end)
+            op, l, _, res = quads[end - 1]
+            if op == 'GOTO':
+                blk.succs = [res]
+            elif op == 'GOTOF':
+                blk.succs = [end, res]
+            elif op in EXITS:
+                blk.exit = True
+            elif op in TAILCALLS:
+                blk.call = l
+                blk.exit = True
+            else:
+                if op in CALLS:
+                    blk.call = l
+                blk.succs = [end]
+            # saltar a n es terminar el programa
+            blk.succs = list(dict.fromkeys(x for x in blk.succs if x < n))
+            self.blocks[start] = blk
+        for blk in self.blocks.values():
+            for s in blk.succs:
+                self.blocks[s].preds.append(blk.start)
+
+    @property
+    def main_entry(self):
+        q = self.quads
+        return q[0][3] if q and q[0][0] == 'GOTO' else 0
+
+    def block_at(self, ip):
+        """Bloque que contiene el cuádruplo `ip`."""
+        return self.blocks[self.starts[bisect_right(self.starts, ip) - 1]]
+
+    def region(self, entry):
+        """Bloques alcanzables desde `entry` sin seguir llamadas, en orden de ip."""
+        if entry >= len(self.quads):
+            return []
+        seen = {entry}
+        stack = [entry]
+        while stack:
+            for s in self.blocks[stack.pop()].succs:
+                if s not in seen:
+                    seen.add(s)
+                    stack.append(s)
+        return [self.blocks[b] for b in sorted(seen)]
+
+    def reverse_postorder(self, entry):
+        order, seen = [], {entry}
+        stack = [(entry, iter(self.blocks[entry].succs))]
+        while stack:
+            b, it = stack[-1]
+            for s in it:
+                if s not in seen:
+                    seen.add(s)
+                    stack.append((s, iter(self.blocks[s].succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(b)
+        return order[::-1]
+
+    def components(self, entry):
+        """Componentes fuertemente conexas alcanzables desde `entry` (Tarjan, sin recursión)."""
+        index, low, on, stack, out = {entry: 0}, {entry: 0}, {entry}, [entry], []
+        work = [(entry, iter(self.blocks[entry].succs))]
+        while work:
+            b, it = work[-1]
+            for s in it:
+                if s not in index:
+                    index[s] = low[s] = len(index)
+                    on.add(s)
+                    stack.append(s)
+                    work.append((s, iter(self.blocks[s].succs)))
+                    break
+                if s in on:
+                    low[b] = min(low[b], index[s])
+            else:
+                work.pop()
+                if work:
+                    p = work[-1][0]
+                    low[p] = min(low[p], low[b])
+                if low[b] == index[b]:
+                    comp = []
+                    while True:
+                        x = stack.pop()
+                        on.discard(x)
+                        comp.append(x)
+                        if x == b:
+                            break
+                    out.append(comp)
+        return out
+
+    def loops(self, entry):
+        """Componentes de `components` que forman ciclo (más de un bloque o una vuelta a sí mismo)."""
+        return [c for c in self.components(entry)
+                if len(c) > 1 or c[0] in self.blocks[c[0]].succs]
+
+    def dominators(self, entry):
+        """Dominador inmediato de cada bloque alcanzable desde `entry` (Cooper, Harvey y Kennedy)."""
+        rpo = self.reverse_postorder(entry)
+        index = {b: i for i, b in enumerate(rpo)}
+        idom = {entry: entry}
+
+        def intersect(a, b):
+            while a != b:
+                while index[a] > index[b]:
+                    a = idom[a]
+                while index[b] > index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in rpo[1:]:
+                new = None
+                for p in self.blocks[b].preds:
+                    if p in idom:
+                        new = p if new is None else intersect(p, new)
+                if idom.get(b) != new:
+                    idom[b] = new
+                    changed = True
+        return idom
+
+    def dominates(self, idom, a, b):
+        """True si el bloque `a` domina a `b` según el mapa `idom` de dominators()."""
+        while True:
+            if a == b:
+                return True
+            parent = idom.get(b)
+            if parent is None or parent == b:
+                return False
+            b = parent
+
+    def back_edges(self, entry):
+        """Aristas (origen, destino) cuyo destino domina al origen: las vueltas de los ciclos."""
+        idom = self.dominators(entry)
+        return [(b, s) for b in idom for s in self.blocks[b].succs if self.dominates(idom, s, b)]
@@ -0,0 +1,149 @@
+"""Depurador sobre la VM: breakpoints por cuádruplo, watchpoints por variable y una consola.
+
+    dbg = Debugger(vm, gen)
+    dbg.break_at(12)
+    dbg.watch("x")
+    trap = dbg.cont()          # Trap (breakpoint/watch) o None si el programa terminó
+    dbg.read("x"), dbg.backtrace()
+    dbg.repl()                 # consola interactiva (h para ayuda)
+
+Sin breakpoints ni watchpoints la VM corre exactamente igual: los puntos de paro se
+instalan reemplazando la entrada decodificada del cuádruplo, no revisando banderas.
+"""
+import sys
+
+from semantico import SemanticError
+
+
+class Debugger:
+    def __init__(self, vm, gen=None):
+        self.vm = vm
+        self.gen = gen
+
+    # -- nombres -------------------------------------------------------------
+    def resolve(self, target):
+        """Dirección de `target`: un entero, o el nombre de una variable del ámbito actual o global."""
+        if isinstance(target, int):
+            return target
+        if target.lstrip("-").isdigit():
+            return int(target)
+        if self.gen is not None:
+            finfo = self.gen.funcs.get(self.vm.current_frame.func)
+            vinfo = (finfo.vars.lookup(target) if finfo else None) or self.gen.global_vars.lookup(target)
+            if vinfo:
+                return vinfo.addr
+        raise SemanticError(f"Variable '{target}' no encontrada")
+
+    # -- puntos de paro ------------------------------------------------------
+    def break_at(self, ip):
+        self.vm.set_breakpoint(ip)
+
+    def clear(self, ip):
+        self.vm.clear_breakpoint(ip)
+
+    def watch(self, target):
+        addr = self.resolve(target)
+        self.vm.watch(addr)
+        return addr
+
+    def unwatch(self, target):
+        self.vm.unwatch(self.resolve(target))
+
+    # -- ejecución -----------------------------------------------------------
+    def cont(self):
+        """Corre hasta el siguiente punto de paro; regresa el Trap o None si el programa terminó."""
+        self.vm.run()
+        return self.vm.last_trap
+
+    def step(self, n=1):
+        self.vm.step(n)
+        return self.vm.last_trap
+
+    # -- inspección ----------------------------------------------------------
+    def read(self, target):
+        addr = self.resolve(target)
+        mem = self.vm._target_mem(addr)
+        if addr not in mem:
+            raise SemanticError(f"Dirección {addr} sin valor")
+        return mem[addr]
+
+    def where(self):
+        ip = self.vm.ip
+        quad = self.vm.cuadruplos[ip] if ip < len(self.vm.cuadruplos) else None
+        return ip, quad
+
+    def backtrace(self):
+        """Marcos de la llamada más reciente a la más antigua: (función, ip de regreso)."""
+        frames = [self.vm.current_frame] + self.vm.call_stack[::-1]
+        return [(f.func, f.ret_ip) for f in frames]
+
+    # -- consola -------------------------------------------------------------
+    AYUDA = """comandos:
+  b N        breakpoint en el cuádruplo N        d N   quitarlo
+  w VAR      watchpoint en una variable o dirección  uw VAR  quitarlo
+  c          continuar                           s [N] ejecutar N cuádruplos
+  p VAR      imprimir valor                      bt    pila de llamadas
+  l          cuádruplos alrededor del actual     q     salir"""
+
+    def repl(self, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        out = stdout or sys.stdout
+        self._report(None, out)
+        while not self.vm.finished:
+            print("(pato) ", end="", file=out, flush=True)
+            line = stdin.readline()
+            if not line:
+                break
+            cmd, *args = line.split() or [""]
+            try:
+                if cmd in ("q", "salir"):
+                    break
+                elif cmd == "b":
+                    self.break_at(int(args[0]))
+                elif cmd == "d":
+                    self.clear(int(args[0]))
+                elif cmd == "w":
+                    print(f"vigilando {args[0]} ({self.watch(args[0])})", file=out)
+                elif cmd == "uw":
+                    self.unwatch(args[0])
+                elif cmd == "c":
+                    self._report(self.cont(), out)
+                elif cmd == "s":
+                    self._report(self.step(int(args[0]) if args else 1), out)
+                elif cmd == "p":
+                    print(f"{args[0]} = {self.read(args[0])!r}", file=out)
+                elif cmd == "bt":
+                    for func, ret_ip in self.backtrace():
+                        print(f"  {func}" + (f" (regresa a {ret_ip})" if ret_ip is not None else ""), file=out)
+                elif cmd == "l":
+                    ip = self.vm.ip
+                    for i in range(max(0, ip - 3), min(len(self.vm.cuadruplos), ip + 4)):
+                        mark = "=>" if i == ip else ("b " if i in self.vm.breakpoints else "  ")
+                        print(f"{mark}{i:5}: {self.vm.cuadruplos[i]}", file=out)
+                elif cmd:
+                    print(self.AYUDA, file=out)
+            except (SemanticError, IndexError, ValueError) as e:
+                print(f"error: {e}", file=out)
+        if self.vm.finished:
+            print("programa terminado", file=out)
+
+    def line(self, ip=None):
+        """Línea del fuente del cuádruplo `ip` (por omisión el actual); 0 si no se conoce."""
+        ip = self.vm.ip if ip is None else ip
+        lines = self.vm.lines
+        return lines[ip] if lines is not None and ip < len(lines) else 0
+
+    def _at(self, ip):
+        linea = self.line(ip)
+        return f"{ip} (línea {linea})" if linea else f"{ip}"
+
+    def _report(self, trap, out):
+        if trap is None:
+            ip, quad = self.where()
+            if quad is not None:
+                print(f"detenido en {self._at(ip)}: {quad}", file=out)
+        elif trap.kind == "breakpoint":
+            print(f"breakpoint en {self._at(trap.ip)}: {self.vm.cuadruplos[trap.ip]}", file=out)
+        else:
+            print(f"watchpoint {trap.addr}: {trap.old!r} -> {trap.new!r} (sigue en {self._at(trap.ip)})",
+                  file=out)
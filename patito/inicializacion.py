@@ -0,0 +1,293 @@
+"""Análisis de asignación definitiva sobre los cuádruplos.
+
+Para cada lectura de una variable (global, local o temporal) decide si en todos los caminos
+ya recibió valor. Es interprocedural: cada función recibe como entrada lo que está asignado
+en todas sus llamadas y aporta a quien la llama lo que asigna en todas sus salidas.
+
+  * una lectura sin asignación en ningún camino es un error de compilación (SemanticError);
+  * una lectura asignada solo en algunos caminos queda como advertencia y el programa no se
+    considera probado;
+  * si no hay advertencias (`InitReport.proven`), la VM puede correr sin revisar cada lectura.
+
+Los conjuntos de direcciones se representan como enteros usados como bitsets.
+"""
+from collections import deque
+from heapq import heappop, heappush
+from dataclasses import dataclass, field
+
+from cfg import CFG, CALLS, TAILCALLS
+from semantico import VirtualMemory, SemanticError, ARIT, RELOP
+
+_SEG_BY_INDEX = {base // VirtualMemory.SPAN: seg
+                 for seg, types in VirtualMemory.BASES.items() for base in types.values()}
+_TRACKED = {i for i, seg in _SEG_BY_INDEX.items() if seg in ('global', 'local', 'temp')}
+
+
+def segment_of(addr):
+    if not isinstance(addr, int):
+        return None
+    return _SEG_BY_INDEX.get(addr // VirtualMemory.SPAN)
+
+
+def quad_uses(quad):
+    """Regresa (lecturas, escritura) de direcciones de memoria del cuádruplo."""
+    op, l, r, res = quad
+    if op in ARIT or op in RELOP:
+        return ((l,) if r is None else (l, r)), res
+    if op == '=':
+        return (l,), res
+    if op in ('PRINT', 'GOTOF', 'PARAM'):
+        return (l,), None
+    if op == 'RET' and l is not None:
+        return (l,), res
+    if op in TAILCALLS:
+        # al volver el llamado, su valor queda en el slot de quien llamó a esta función
+        return (), r
+    return (), None
+
+
+@dataclass
+class InitReport:
+    warnings: list = field(default_factory=list)   # (ip, addr, nombre) leídas sin valor en algún camino
+
+    @property
+    def proven(self):
+        return not self.warnings
+
+
+class InitAnalyzer:
+    def __init__(self, quads, funcs, global_names=None, preset=()):
+        self.quads = quads
+        self.funcs = funcs
+        self.global_names = global_names or {}
+        self.preset = preset   # direcciones globales que ya tienen valor al empezar main
+        self.bits = {}       # dirección -> posición de su bit
+        self.gmask = 0
+        self.cfg = CFG(quads, funcs)
+        self.blocks = self.cfg.blocks
+        self.writes = {}
+        self._rpo = {}       # entrada de región -> (orden inverso posterior, ciclos)
+        self._build_blocks()
+
+    # -- bitsets -------------------------------------------------------------
+    def _bit(self, addr):
+        # se guarda la posición y no la máscara: con decenas de miles de temporales, guardar
+        # cada 1 << k costaría memoria cuadrática
+        i = self.bits.get(addr)
+        if i is None:
+            i = self.bits[addr] = len(self.bits)
+            if segment_of(addr) == 'global':
+                self.gmask |= 1 << i
+        return 1 << i
+
+    @staticmethod
+    def _tracked(addr):
+        return isinstance(addr, int) and addr // VirtualMemory.SPAN in _TRACKED
+
+    # -- bloques básicos -----------------------------------------------------
+    def _build_blocks(self):
+        quads = self.quads
+        for blk in self.blocks.values():
+            w = 0
+            for i in range(blk.start, blk.end):
+                _, write = quad_uses(quads[i])
+                if write is not None and self._tracked(write):
+                    w |= self._bit(write)
+            self.writes[blk.start] = w
+
+    def _region(self, entry):
+        return [blk.start for blk in self.cfg.region(entry)]
+
+    # -- flujo de datos ------------------------------------------------------
+    def _transfer(self, blk, s, exits, calls=None):
+        s |= self.writes[blk.start]
+        if blk.call is not None:
+            if calls is not None:
+                calls.append((blk.call, s & self.gmask))
+            s |= exits.get(blk.call, 0)
+        return s
+
+    def _solve(self, entry_block, entry_value, exits, must, top):
+        # lista de trabajo por orden inverso posterior: solo se revisitan los sucesores de un
+        # bloque cuya salida cambió, así que un anidamiento profundo no repite todo el tramo
+        rpo = self._rpo.get(entry_block)
+        if rpo is None:
+            if entry_block in self.blocks:
+                rpo = (self.cfg.reverse_postorder(entry_block), self.cfg.loops(entry_block))
+            else:
+                rpo = ([], [])
+            self._rpo[entry_block] = rpo
+        rpo, loops = rpo
+        index = {b: k for k, b in enumerate(rpo)}
+        init = top if must else 0
+        out = dict.fromkeys(rpo, init)
+        if not must:
+            # en la unión, todo bloque de un ciclo termina con lo que escribe el ciclo completo;
+            # sembrarlo evita que lo de cada nivel baje otra vez por todos los ciclos internos
+            for comp in loops:
+                g = 0
+                for b in comp:
+                    g = self._transfer(self.blocks[b], g, exits)
+                for b in comp:
+                    out[b] = g
+        ins = {}
+        work = list(range(len(rpo)))     # ya ordenada: es un heap válido
+        queued = bytearray(b"\x01") * len(rpo)
+        while work:
+            k = heappop(work)
+            queued[k] = 0
+            b = rpo[k]
+            blk = self.blocks[b]
+            s = entry_value if b == entry_block else init
+            for p in blk.preds:
+                if p in index:
+                    s = s & out[p] if must else s | out[p]
+            ins[b] = s
+            new = self._transfer(blk, s, exits)
+            if new != out[b]:
+                out[b] = new
+                for succ in blk.succs:
+                    j = index[succ]
+                    if not queued[j]:
+                        queued[j] = 1
+                        heappush(work, j)
+        return ins
+
+    def analyze(self):
+        for addr in self.global_names:
+            self._bit(addr)
+        main_entry = self.cfg.main_entry
+        regions = {None: self._region(main_entry)}
+        entries = {None: main_entry}
+        callers = {}
+        # funciones alcanzables desde main siguiendo los GOSUB, en orden BFS
+        order = [None]
+        for name in order:
+            for b in regions[name]:
+                callee = self.blocks[b].call
+                if callee is not None:
+                    callers.setdefault(callee, set()).add(name)
+                    if callee not in regions:
+                        finfo = self.funcs.get(callee)
+                        entries[callee] = finfo.start_quad
+                        regions[callee] = self._region(finfo.start_quad)
+                        order.append(callee)
+        param_bits = {name: self._params_mask(name) for name in regions}
+        preset = 0
+        for addr in self.preset:
+            preset |= self._bit(addr)
+        top = (1 << len(self.bits)) - 1
+        gtop = top & self.gmask
+
+        def fixpoint(must):
+            entry_g = {name: gtop if must else 0 for name in order}
+            entry_g[None] = preset
+            exits = {name: gtop if must else 0 for name in order if name is not None}
+            sites = {}   # callee -> {caller: conjunto en sus llamadas}
+            ins_all = {}
+            work = deque(order)
+            queued = set(order)
+            while work:
+                name = work.popleft()
+                queued.discard(name)
+                region = regions[name]
+                ins = self._solve(entries[name], entry_g[name] | param_bits[name], exits, must, top)
+                ins_all[name] = ins
+                calls, exit_sets = [], []
+                for b in region:
+                    blk = self.blocks[b]
+                    s = self._transfer(blk, ins[b], exits, calls)
+                    if blk.exit:
+                        exit_sets.append(s & self.gmask)
+                by_callee = {}
+                for callee, g in calls:
+                    by_callee.setdefault(callee, []).append(g)
+                for callee, gs in by_callee.items():
+                    sites.setdefault(callee, {})[name] = _meet(gs, must, gtop)
+                    new_entry = _meet(list(sites[callee].values()), must, gtop)
+                    if new_entry != entry_g[callee]:
+                        entry_g[callee] = new_entry
+                        if callee not in queued:
+                            queued.add(callee)
+                            work.append(callee)
+                if name is not None:
+                    new_exit = _meet(exit_sets, must, gtop)
+                    if new_exit != exits[name]:
+                        exits[name] = new_exit
+                        for caller in callers.get(name, ()):
+                            if caller not in queued:
+                                queued.add(caller)
+                                work.append(caller)
+            return ins_all, exits
+
+        must_ins, must_exits = fixpoint(True)
+        may_ins, may_exits = fixpoint(False)
+
+        report = InitReport()
+        for name, ins in must_ins.items():
+            for b, s in ins.items():
+                self._check_block(self.blocks[b], s, may_ins[name][b], must_exits, may_exits, name, report)
+        return report
+
+    def _params_mask(self, name):
+        if name is None:
+            return 0
+        m = 0
+        for p in self.funcs.get(name).params:
+            m |= self._bit(p.addr)
+        return m
+
+    def _check_block(self, blk, must, may, must_exits, may_exits, fname, report):
+        for i in range(blk.start, blk.end):
+            quad = self.quads[i]
+            if quad[0] in CALLS or quad[0] in TAILCALLS:
+                must |= must_exits.get(quad[1], 0)
+                may |= may_exits.get(quad[1], 0)
+                if quad[0] in CALLS:
+                    continue
+            reads, write = quad_uses(quad)
+            if quad[0] in TAILCALLS and write is not None:
+                # lo que se regresa es el valor de retorno del llamado
+                reads = (self.funcs.get(quad[1]).ret_addr,)
+            for addr in reads:
+                if not self._tracked(addr):
+                    continue
+                b = self._bit(addr)
+                if not may & b:
+                    raise SemanticError(f"{self._describe(addr, fname)} se usa sin haber recibido valor")
+                if not must & b:
+                    report.warnings.append((i, addr, self._describe(addr, fname)))
+            if write is not None and self._tracked(write):
+                b = self._bit(write)
+                must |= b
+                may |= b
+
+    def _describe(self, addr, fname):
+        if segment_of(addr) == 'global':
+            return self.global_names.get(addr, f"Dirección {addr}")
+        finfo = self.funcs.get(fname) if fname else None
+        if finfo:
+            for v in finfo.vars.by_name.values():
+                if v.addr == addr:
+                    return f"Variable '{v.name}'"
+        return f"Dirección {addr}"
+
+
+def _meet(sets, must, top):
+    if not sets:
+        # sin llamadas (o sin salidas): nada que limitar
+        return top if must else 0
+    out = sets[0]
+    for s in sets[1:]:
+        out = out & s if must else out | s
+    return out
+
+
+def analyze_init(gen):
+    """Corre el análisis sobre un QuadGenerator ya usado; ver InitReport."""
+    names = {v.addr: f"Variable '{v.name}'" for v in gen.global_vars.by_name.values()}
+    for f in gen.funcs.all():
+        if f.ret_addr is not None:
+            names[f.ret_addr] = f"El valor de retorno de '{f.name}'"
+    preset = [gen.global_vars.lookup(n).addr for n in gen.inputs]
+    return InitAnalyzer(gen.cuadruplos, gen.funcs, names, preset).analyze()
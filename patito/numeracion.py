@@ -0,0 +1,117 @@
+"""Numeración de valores local: una subexpresión ya calculada en el mismo tramo se reutiliza.
+
+Dos cuádruplos (op, l, r) iguales calculan lo mismo mientras ningún operando se reasigne; el
+segundo se quita y sus lecturas pasan al temporal del primero:
+
+    + a b t1; ...; + a b t2; * t1 t2 t3      =>      + a b t1; ...; * t1 t1 t3
+
+Cada temporal se asigna en un solo lugar de su función, así que el renombre es válido en toda
+ella: t1 se calculó antes en el mismo tramo y no cambia. Los tramos se cortan en los destinos
+de salto y después de GOTO/RET/ENDFUNC/PAR (la continuación de un GOTOF solo se alcanza desde
+él); una llamada no corta el tramo pero invalida lo que dependa de globales.
+"""
+from inicializacion import segment_of
+from plegado import func_end
+from semantico import ARIT, RELOP, ENTERO, FLOTANTE, VirtualMemory
+
+_TYPE_BY_INDEX = {base // VirtualMemory.SPAN: t
+                  for types in VirtualMemory.BASES.values() for t, base in types.items()}
+# con operandos numéricos el orden no importa; '+' de letreros sí es sensible al orden
+_COMMUTATIVE = {'+', '*'}
+_SYMMETRIC = {'==', '!='}
+
+
+_SPAN = VirtualMemory.SPAN
+_NUMERIC = {i for i, t in _TYPE_BY_INDEX.items() if t in (ENTERO, FLOTANTE)}
+_TEMPS = {base // _SPAN for base in VirtualMemory.BASES['temp'].values()}
+# solo globales y locales se reasignan: los temporales se escriben una vez y las constantes nunca
+_VARS = {base // _SPAN for seg in ('global', 'local') for base in VirtualMemory.BASES[seg].values()}
+
+
+def _key(op, l, r):
+    if r is not None and r < l and (op in _SYMMETRIC or (op in _COMMUTATIVE and l // _SPAN in _NUMERIC
+                                                          and r // _SPAN in _NUMERIC)):
+        l, r = r, l
+    return (op, l, r)
+
+
+class ValueNumbering:
+    def __init__(self, quads, funcs):
+        self.quads = quads
+        self.funcs = funcs
+        self.reused = 0
+
+    def run(self):
+        q = self.quads
+        labels = {f.start_quad for f in self.funcs.all() if f.start_quad is not None}
+        for op, _, _, res in q:
+            if op in ('GOTO', 'GOTOF', 'PAR'):
+                labels.add(res)
+        main = q[0][3] if q and q[0][0] == 'GOTO' else 0
+        regions = [(f.start_quad, func_end(q, f)) for f in self.funcs.all() if f.start_quad is not None]
+        regions.append((main, len(q)))
+        drop = set()
+        for start, end in regions:
+            self._number_region(start, end, labels, drop)
+        return drop
+
+    def _number_region(self, start, end, labels, drop):
+        q = self.quads
+        defs = {}
+        for i in range(start, end):
+            op, _, _, res = q[i]
+            if (op in ARIT or op in RELOP or op == '=') and res // _SPAN in _TEMPS:
+                defs[res] = defs.get(res, 0) + 1
+        alias = {}     # temporal quitado -> temporal que ya tenía el valor
+        table = {}     # (op, l, r) -> temporal
+        users = {}     # variable -> llaves de `table` que la leen
+        for i in range(start, end):
+            if i in labels:
+                table.clear()
+                users.clear()
+            op, l, r, res = q[i]
+            if alias and op != 'PAR':
+                nl, nr = alias.get(l, l), alias.get(r, r)
+                if nl is not l or nr is not r:
+                    q[i] = (op, nl, nr, res)
+                    l, r = nl, nr
+            if op in ARIT or op in RELOP:
+                if defs.get(res) != 1:
+                    # escribe una variable (el índice de 'paralelo') o un temporal de varios lugares
+                    if res in users:
+                        self._kill(res, table, users)
+                    continue
+                key = _key(op, l, r)
+                prev = table.get(key)
+                if prev is not None:
+                    alias[res] = prev
+                    drop.add(i)
+                    self.reused += 1
+                    continue
+                table[key] = res
+                if l // _SPAN in _VARS:
+                    users.setdefault(l, []).append(key)
+                if r is not None and r // _SPAN in _VARS:
+                    users.setdefault(r, []).append(key)
+            elif op == '=':
+                if res in users:
+                    self._kill(res, table, users)
+            elif op == 'GOSUB':
+                # el llamado pudo cambiar globales (y deja su valor en la casilla de retorno)
+                for a in [a for a in users if segment_of(a) == 'global']:
+                    self._kill(a, table, users)
+            elif op in ('GOTO', 'RET', 'ENDFUNC', 'PAR'):
+                table.clear()
+                users.clear()
+
+    @staticmethod
+    def _kill(addr, table, users):
+        for key in users.pop(addr, ()):
+            table.pop(key, None)
+
+
+def number_values(gen):
+    """Quita de `gen.cuadruplos` las subexpresiones repetidas; regresa cuántas se reutilizaron."""
+    vn = ValueNumbering(gen.cuadruplos, gen.funcs)
+    gen._compact(vn.run())
+    return vn.reused
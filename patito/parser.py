@@ -8,6 +8,21 @@ precedence = (
     ('right','UMINUS'),
 )
 
+class Nodo(tuple):
+    # Tupla del AST que además recuerda dónde empieza en el fuente (se compara como tupla).
+    linea = 0
+    columna = 0
+
+def _nodo(p, n, tup):
+    node = Nodo(tup)
+    node.linea = p.lineno(n)
+    # columna a partir de lexpos; TokenReplay conserva lexdata si el parser recibe el fuente
+    data = getattr(p.lexer, 'lexdata', None)
+    if data:
+        pos = p.lexpos(n)
+        node.columna = pos - data.rfind('\n', 0, pos)
+    return node
+
 def p_programa(p):
     '''programa : PROGRAM ID SEMICOLON vars funcs_section INICIO cuerpo FIN
                 | PROGRAM ID SEMICOLON vars funcs_section INICIO cuerpo FIN SEMICOLON
@@ -71,14 +86,14 @@ def p_funcs(p):
 
 def p_funcion(p):
     'funcion : FUNC ID LPAREN params_opt RPAREN tipo_ret vars cuerpo FINF'
-    p[0] = ('func', p[2], p[4], p[6], p[7], p[8])
+    p[0] = _nodo(p, 1, ('func', p[2], p[4], p[6], p[7], p[8]))
 
 def p_funcion_alt(p):
     'funcion : tipo ID LPAREN params_opt RPAREN func_body_block'
     tipo_ret = p[1]
     params = p[4]
     vars_node, cuerpo_node = p[6]
-    p[0] = ('func', p[2], params, tipo_ret, vars_node, cuerpo_node)
+    p[0] = _nodo(p, 2, ('func', p[2], params, tipo_ret, vars_node, cuerpo_node))
 
 def p_funcion_sig_first(p):
     'funcion : ID LPAREN params_opt RPAREN COLON tipo func_body_block'
@@ -86,7 +101,7 @@ def p_funcion_sig_first(p):
     params = p[3]
     tipo_ret = p[6]
     vars_node, cuerpo_node = p[7]
-    p[0] = ('func', name, params, tipo_ret, vars_node, cuerpo_node)
+    p[0] = _nodo(p, 1, ('func', name, params, tipo_ret, vars_node, cuerpo_node))
 
 def p_func_body_block(p):
     '''func_body_block : LBRACE func_body_inner RBRACE'''
@@ -122,7 +137,7 @@ def p_tipo_ret(p):
 
 def p_cuerpo(p):
     'cuerpo : estatutos'
-    p[0] = ('cuerpo', p[1])
+    p[0] = ('cuerpo', p[1][::-1])
 
 def p_cuerpo_braced(p):
     '''cuerpo_braced : LBRACE estatutos RBRACE
@@ -136,12 +151,18 @@ def p_cuerpo_braced(p):
     if isinstance(inner, tuple) and inner[0] == 'cuerpo':
         p[0] = inner
     else:
-        p[0] = ('cuerpo', inner)
+        p[0] = ('cuerpo', inner[::-1])
 
 def p_estatutos(p):
     '''estatutos : estatuto estatutos
                  | empty'''
-    p[0] = [p[1]] + p[2] if len(p) == 3 else []
+    # Recursión por la derecha: se acumula al revés con append (lineal, no cuadrático)
+    # y cuerpo/cuerpo_braced voltean la lista al final.
+    if len(p) == 3:
+        p[2].append(p[1])
+        p[0] = p[2]
+    else:
+        p[0] = []
 
 def p_estatuto(p):
     '''estatuto : asigna SEMICOLON
@@ -150,17 +171,19 @@ def p_estatuto(p):
                 | condicion SEMICOLON
                 | ciclo
                 | ciclo SEMICOLON
+                | paralelo
+                | paralelo SEMICOLON
                 | llamada SEMICOLON
                 | retorna SEMICOLON'''
     p[0] = p[1]
 
 def p_asigna(p):
     'asigna : ID IGUAL expresion'
-    p[0] = ('asigna', p[1], p[3])
+    p[0] = _nodo(p, 1, ('asigna', p[1], p[3]))
 
 def p_imprime(p):
     'imprime : ESCRIBE LPAREN imprime_args RPAREN'
-    p[0] = ('imprime', p[3])
+    p[0] = _nodo(p, 1, ('imprime', p[3]))
 
 def p_imprime_args(p):
     '''imprime_args : imprime_item COMMA imprime_args
@@ -176,7 +199,7 @@ def p_condicion(p):
     '''condicion : SI LPAREN expresion RPAREN opt_semicolon cuerpo sino_opt
                  | SI LPAREN expresion RPAREN opt_semicolon cuerpo_braced sino_opt'''
     cuerpo_node = p[6]
-    p[0] = ('si', p[3], cuerpo_node, p[7])
+    p[0] = _nodo(p, 1, ('si', p[3], cuerpo_node, p[7]))
 
 def p_sino_opt(p):
     '''sino_opt : SINO cuerpo
@@ -191,11 +214,27 @@ def p_ciclo(p):
     '''ciclo : MIENTRAS LPAREN expresion RPAREN opt_semicolon HAZ cuerpo
              | MIENTRAS LPAREN expresion RPAREN opt_semicolon HAZ cuerpo_braced'''
     cuerpo_node = p[7]
-    p[0] = ('mientras', p[3], cuerpo_node)
+    p[0] = _nodo(p, 1, ('mientras', p[3], cuerpo_node))
+
+def p_paralelo(p):
+    '''paralelo : PARALELO LPAREN ID IGUAL expresion SEMICOLON ID LT expresion RPAREN reducciones HAZ cuerpo
+                | PARALELO LPAREN ID IGUAL expresion SEMICOLON ID LT expresion RPAREN reducciones HAZ cuerpo_braced'''
+    # paralelo (i = a; i < b) reduce (suma s, max m) haz { ... }
+    p[0] = _nodo(p, 1, ('paralelo', p[3], p[5], p[7], p[9], p[11], p[13]))
+
+def p_reducciones(p):
+    '''reducciones : REDUCE LPAREN reduccion_list RPAREN
+                   | empty'''
+    p[0] = p[3] if len(p) == 5 else []
+
+def p_reduccion_list(p):
+    '''reduccion_list : ID ID COMMA reduccion_list
+                      | ID ID'''
+    p[0] = [(p[1], p[2])] if len(p) == 3 else [(p[1], p[2])] + p[4]
 
 def p_llamada(p):
     'llamada : ID LPAREN llama_args_opt RPAREN'
-    p[0] = ('call', p[1], p[3])
+    p[0] = _nodo(p, 1, ('call', p[1], p[3]))
 
 def p_llama_args_opt(p):
     '''llama_args_opt : expr_list
@@ -267,7 +306,7 @@ def p_opt_semicolon(p):
 def p_retorna(p):
     '''retorna : RET expresion
                | RET'''
-    p[0] = ('ret', p[2]) if len(p) == 3 else ('ret', None)
+    p[0] = _nodo(p, 1, ('ret', p[2]) if len(p) == 3 else ('ret', None))
 
 def p_empty(p):
     'empty :'
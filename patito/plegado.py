@@ -0,0 +1,230 @@
+"""Evaluación parcial: llamadas a funciones puras con argumentos conocidos se resuelven al compilar.
+
+Una función es pura si no imprime, no usa 'paralelo', no toca globales (salvo las casillas de
+retorno) y solo llama funciones puras. Si en el punto de la llamada se conocen todos los
+argumentos, la función se ejecuta en la VM con un presupuesto de pasos y la secuencia de la
+llamada se reemplaza por la constante que regresó:
+
+    ERA f; PARAM c 0; GOSUB f; = ret_f -> t        =>        = const -> t
+
+Si se agota el presupuesto, la ejecución falla (división entre cero, lectura sin valor...) o
+el resultado no cabe en la tabla de constantes (inf, nan, -0.0), la llamada se queda como
+estaba y el error, si lo hay, ocurre al correr el programa.
+
+Los valores conocidos se siguen en tramos en línea recta: constantes, copias y operaciones
+entre valores conocidos. Se olvidan en cada destino de salto y, las globales, en cada llamada
+que no se resolvió.
+"""
+import io
+import math
+import operator
+
+from inicializacion import quad_uses, segment_of
+from semantico import ARIT, RELOP, ENTERO, FLOTANTE, STRING, BOOL
+
+_UNKNOWN = object()
+_BINARY = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+           "<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge,
+           "==": operator.eq, "!=": operator.ne}
+_UNARY = {"+": operator.pos, "-": operator.neg}
+_PY_TYPE = {ENTERO: int, FLOTANTE: float, STRING: str, BOOL: bool}
+# cuádruplos que solo calculan un valor: se pueden quitar si nadie más lo lee
+_PURE_OPS = ARIT | RELOP | {'='}
+
+
+def func_end(quads, finfo):
+    """Índice del ENDFUNC de la función."""
+    i = finfo.start_quad
+    while quads[i][0] != 'ENDFUNC':
+        i += 1
+    return i
+
+
+def pure_functions(quads, funcs):
+    """Nombres de las funciones puras (ver arriba)."""
+    ret_slots = {f.ret_addr for f in funcs.all() if f.ret_addr is not None}
+    callees = {}
+    for f in funcs.all():
+        if f.start_quad is None:
+            continue
+        called = set()
+        for i in range(f.start_quad, func_end(quads, f)):
+            quad = quads[i]
+            op = quad[0]
+            if op in ('PRINT', 'PAR'):
+                break
+            if op in ('GOSUB', 'TAILCALL'):
+                called.add(quad[1])
+            reads, write = quad_uses(quad)
+            if any(segment_of(a) == 'global' and a not in ret_slots for a in reads + (write,)):
+                break
+        else:
+            callees[f.name] = called
+    # una función que llama a una impura deja de ser pura, hasta estabilizar
+    changed = True
+    while changed:
+        changed = False
+        for name in list(callees):
+            if not callees[name] <= callees.keys():
+                del callees[name]
+                changed = True
+    return set(callees)
+
+
+class PartialEvaluator:
+    def __init__(self, gen, steps):
+        self.gen = gen
+        self.quads = gen.cuadruplos
+        self.funcs = gen.funcs
+        self.budget = steps           # pasos de VM que quedan para todo el plegado
+        self.pure = pure_functions(self.quads, self.funcs)
+        self.consts = {addr: val for (val, _), addr in gen.memory.const_table.items()}
+        self.cache = {}
+        self.folded = 0
+        self._vm = None
+
+    # -- evaluación ----------------------------------------------------------
+    def _evaluate(self, finfo, args):
+        key = (finfo.name, tuple((type(v), v) for v in args))
+        if key in self.cache:
+            return self.cache[key]
+        if self.budget <= 0:
+            return _UNKNOWN
+        from vm import VirtualMachine, Frame, Limits
+        vm = self._vm
+        if vm is None:
+            # una sola VM para todas las llamadas
+            vm = self._vm = VirtualMachine(self.quads, self.funcs, self.gen.memory.const_table,
+                                           output=io.StringIO(), blocks=True)
+            # los bloques se compilan de los cuádruplos ya reescritos, que leen los resultados
+            # plegados antes: la VM comparte la tabla que _fold_call va llenando
+            vm.const_mem = self.consts
+        vm.limits = Limits(steps=self.budget)
+        vm.global_mem = {}
+        vm.call_stack = [Frame("global")]
+        vm.pending_frame = None
+        frame = Frame(finfo.name)
+        for p, v in zip(finfo.params, args):
+            frame.locals[p.addr] = v
+        vm.current_frame = frame
+        vm.ip, vm.steps = finfo.start_quad, 0
+        try:
+            vm.run()
+            result = vm.global_mem.get(finfo.ret_addr) if finfo.ret_type else None
+            if finfo.ret_type and type(result) is not _PY_TYPE[finfo.ret_type]:
+                result = _UNKNOWN
+            elif type(result) is float and (not math.isfinite(result)
+                                            or result == 0 and math.copysign(1, result) < 0):
+                # inf/nan no tienen literal y -0.0 se confundiría con la constante 0.0: la
+                # llamada se queda para tiempo de ejecución
+                result = _UNKNOWN
+        except Exception:
+            # presupuesto agotado o error de ejecución: se deja para tiempo de ejecución
+            result = _UNKNOWN
+        self.budget -= vm.steps
+        self.cache[key] = result
+        return result
+
+    # -- recorrido -----------------------------------------------------------
+    def run(self):
+        q = self.quads
+        labels = {f.start_quad for f in self.funcs.all() if f.start_quad is not None}
+        for op, _, _, res in q:
+            if op in ('GOTO', 'GOTOF', 'PAR'):
+                labels.add(res)
+        main = q[0][3] if q and q[0][0] == 'GOTO' else 0
+        regions = [(f.start_quad, func_end(q, f)) for f in self.funcs.all() if f.start_quad is not None]
+        regions.append((main, len(q)))
+        drop = set()
+        for start, end in regions:
+            self._fold_region(start, end, labels, drop)
+        return drop
+
+    def _value(self, addr, known):
+        if segment_of(addr) == 'const':
+            return self.consts[addr]
+        return known.get(addr, _UNKNOWN)
+
+    def _fold_region(self, start, end, labels, drop):
+        q = self.quads
+        reads = {}
+        for i in range(start, end):
+            for a in quad_uses(q[i])[0]:
+                reads[a] = reads.get(a, 0) + 1
+        known = {}
+        calls = []     # llamadas abiertas: [ip del ERA, función, {índice: valor}, ips de PARAM]
+        for i in range(start, end):
+            if i in labels:
+                known.clear()
+                calls.clear()
+            op, l, r, res = q[i]
+            if op == 'ERA':
+                calls.append([i, l, {}, []])
+            elif op == 'PARAM':
+                if calls:
+                    calls[-1][2][res] = self._value(l, known)
+                    calls[-1][3].append(i)
+            elif op == 'GOSUB':
+                call = calls.pop() if calls and calls[-1][1] == l else None
+                if call is None or not self._fold_call(i, call, known, reads, drop):
+                    # el llamado pudo cambiar globales
+                    for a in [a for a in known if segment_of(a) == 'global']:
+                        del known[a]
+            elif op == '=':
+                v = self._value(l, known)
+                if v is _UNKNOWN:
+                    known.pop(res, None)
+                else:
+                    known[res] = v
+            elif op in ARIT or op in RELOP:
+                lv = self._value(l, known)
+                rv = self._value(r, known) if r is not None else None
+                known.pop(res, None)
+                if lv is not _UNKNOWN and rv is not _UNKNOWN:
+                    try:
+                        known[res] = _UNARY[op](lv) if r is None else _BINARY[op](lv, rv)
+                    except Exception:
+                        pass
+            elif op in ('GOTO', 'RET', 'ENDFUNC', 'PAR'):
+                known.clear()
+                calls.clear()
+
+    def _fold_call(self, i, call, known, reads, drop):
+        era, name, args, params = call
+        finfo = self.funcs.get(name)
+        if name not in self.pure or len(args) != len(finfo.params):
+            return False
+        values = [args.get(k, _UNKNOWN) for k in range(len(finfo.params))]
+        if any(v is _UNKNOWN for v in values):
+            return False
+        result = self._evaluate(finfo, values)
+        if result is _UNKNOWN:
+            return False
+        q = self.quads
+        drop.update((era, i, *params))
+        # los cálculos de argumentos que solo leían los PARAM quitados también sobran
+        dead = {q[p][1] for p in params}
+        for j in range(i - 1, era, -1):
+            op, l, r, res = q[j]
+            if j in drop or op not in _PURE_OPS or res not in dead or reads.get(res) != 1:
+                continue
+            if segment_of(res) != 'temp':
+                continue
+            drop.add(j)
+            dead.update(a for a in (l, r) if a is not None)
+        nxt = q[i + 1] if i + 1 < len(q) else None
+        if finfo.ret_type and nxt is not None and nxt[0] == '=' and nxt[1] == finfo.ret_addr:
+            addr = self.gen.memory.alloc_const(result, finfo.ret_type)
+            self.consts[addr] = result
+            q[i + 1] = ('=', addr, None, nxt[3])
+        self.folded += 1
+        return True
+
+
+def fold_pure_calls(gen, steps):
+    """Pliega las llamadas de `gen.cuadruplos` (ya con GOSUB parchados); regresa cuántas."""
+    ev = PartialEvaluator(gen, steps)
+    if not ev.pure:
+        return 0
+    gen._compact(ev.run())
+    return ev.folded
@@ -1,44 +1,163 @@
-from scanner import build_lexer
+import time
+import tracemalloc
+
+from scanner import build_lexer, tokenize, TokenReplay, scan
 from parser import build_parser
 from semantico import QuadGenerator, SemanticError
-from vm import VirtualMachine
+from vm import VirtualMachine, Limits, LimitExceeded
+from debugger import Debugger
+from profiler import LineProfiler
 
-def parse_text(src: str):
-    lexer = build_lexer()
+def parse_text(src: str, compacto=False):
+    # compacto: tokens en un TokenBuffer (scanner.scan) en lugar del lexer de PLY
+    lexer = scan(src).lexer() if compacto else build_lexer()
     parser = build_parser()
     return parser.parse(src, lexer=lexer)
 
+class PhaseStats:
+    """Tiempos de pared/CPU y memoria pico (tracemalloc) por fase."""
+    def __init__(self):
+        self.fases = []
+        tracemalloc.start()
+
+    def medir(self, nombre, fn, *args):
+        tracemalloc.reset_peak()
+        w0, c0 = time.perf_counter(), time.process_time()
+        res = fn(*args)
+        pared, cpu = time.perf_counter() - w0, time.process_time() - c0
+        self.fases.append((nombre, pared, cpu, tracemalloc.get_traced_memory()[1]))
+        return res
+
+    def reporte(self, gen, quads, vm=None):
+        tracemalloc.stop()
+        print("\nEstadísticas")
+        print(f"  {'fase':<12}{'pared (s)':>12}{'cpu (s)':>12}{'pico KiB':>12}")
+        for nombre, pared, cpu, pico in self.fases:
+            print(f"  {nombre:<12}{pared:>12.4f}{cpu:>12.4f}{pico / 1024:>12.1f}")
+        print(f"  cuadruplos: {len(quads)}")
+        print(f"  constantes: {len(gen.memory.const_table)}")
+        print(f"  funciones: {len(gen.funcs.funcs)}")
+        print(f"  funciones sin generar: {len(gen.dead_funcs)}")
+        print(f"  llamadas plegadas: {gen.folded_calls}")
+        print(f"  subexpresiones reutilizadas: {gen.cse_reused}")
+        for seg in ("global", "const"):
+            print(f"  {seg}: {gen.memory.usage(seg)}")
+        # local/temp se reinician por función: se reporta el máximo por tipo entre funciones y main
+        for seg, attr in (("local", "locals_count"), ("temp", "temps_count")):
+            usos = [getattr(f, attr) for f in gen.funcs.all()]
+            if seg == "temp":
+                usos.append(gen.main_temp_usage)
+            maximo = {t: max((u.get(t, 0) for u in usos), default=0) for t in gen.memory.usage(seg)}
+            print(f"  {seg} (máx por función): {maximo}")
+        if vm is not None:
+            print(f"  cuadruplos ejecutados: {vm.steps}")
+            print(f"  profundidad máx. de llamadas: {vm.max_depth}")
+
 if __name__ == "__main__":
     import sys
-    run_flag = False
     args = sys.argv[1:]
-    if "--run" in args:
-        run_flag = True
-        args.remove("--run")
+    flags = {a for a in args if a.startswith("-")}
+    args = [a for a in args if not a.startswith("-")]
+    run_flag = "--run" in flags
+    # --stats: tiempos por fase, conteos y memoria pico (tracemalloc agrega sobrecosto a los tiempos)
+    stats_flag = "--stats" in flags
+    # -q/--quiet: omite AST, tablas y listado de cuadruplos (costosos en programas grandes)
+    quiet = bool(flags & {"-q", "--quiet"})
+    def opcion(nombre, default=None):
+        return next((f.split("=", 1)[1] for f in flags if f.startswith(nombre + "=")), default)
+    # --jobs=N: genera los cuerpos de funciones y reparte los ciclos paralelo en N procesos
+    # (0 = todos los núcleos)
+    jobs = int(opcion("--jobs", 1))
+    # --checkpoint=ARCHIVO [--checkpoint-every=N]: snapshot cada N cuádruplos y con SIGUSR1
+    # --resume=ARCHIVO: continúa la ejecución desde un snapshot del mismo programa
+    checkpoint = opcion("--checkpoint")
+    checkpoint_every = opcion("--checkpoint-every")
+    resume = opcion("--resume")
+    # --sin-bloques: la VM despacha cuádruplo por cuádruplo en vez de por bloque básico
+    blocks = "--sin-bloques" not in flags
+    # --depurar: abre la consola del depurador en lugar de correr de corrido
+    debug = "--depurar" in flags
+    # --perfil[=N]: corre midiendo cuádruplos y tiempo por línea del fuente; muestra las N más costosas
+    perfil = "--perfil" in flags or opcion("--perfil") is not None
+    perfil_top = int(opcion("--perfil", 20))
+    # --max-pasos=N --max-profundidad=N --max-slots=N: presupuestos para programas no confiables;
+    # al agotarse uno la ejecución se corta con un reporte y sale con código 2
+    limits = Limits(*(int(v) if v else None
+                      for v in (opcion("--max-pasos"), opcion("--max-profundidad"), opcion("--max-slots"))))
+    # --plegado=N: pasos de VM para evaluar al compilar llamadas puras con argumentos conocidos
+    # (0 = no plegar)
+    fold_steps = int(opcion("--plegado", 100_000))
+    # --compacto: escanea a un TokenBuffer en vez de crear un LexToken por token
+    compacto = "--compacto" in flags
+    # --estricto: revisa también las funciones que main nunca llama (por omisión no se generan)
+    strict = "--estricto" in flags
     src = open(args[0], encoding="utf-8").read() if args else sys.stdin.read()
-    ast = parse_text(src)
-    print("AST")
-    print(ast)
+    stats = PhaseStats() if stats_flag else None
+    if stats:
+        toks = stats.medir("lexico", scan if compacto else tokenize, src)
+        parser = build_parser()
+        lexer = toks.lexer() if compacto else TokenReplay(toks)
+        ast = stats.medir("sintaxis", lambda: parser.parse(src, lexer=lexer))
+    else:
+        ast = parse_text(src, compacto)
+    if not quiet:
+        print("AST")
+        print(ast)
     try:
-        gen = QuadGenerator()
-        quads = gen.analyze(ast)
-        print("\nDirecciones virtuales (globales):")
-        for name, info in gen.global_vars.by_name.items():
-            print(f"  {name} [{info.vtype}] -> {info.addr}")
-        print("\nFunciones:")
-        for f in gen.funcs.all():
-            params = ", ".join([f"{p.name}:{p.vtype}" for p in f.params]) if f.params else "-"
-            print(f"  {f.name}({params}) -> {f.ret_type or 'void'} inicio={f.start_quad} ret={f.ret_addr}")
-        print("\nConstantes:")
-        for (val, t), addr in sorted(gen.memory.const_table.items(), key=lambda kv: kv[1]):
-            print(f"  {repr(val)} [{t}] -> {addr}")
-        print("\nCuadruplos")
-        for i, q in enumerate(quads):
-            print(i, ":", q)
+        gen = QuadGenerator(jobs=jobs, fold_steps=fold_steps, strict=strict)
+        quads = stats.medir("semantico", gen.analyze, ast) if stats else gen.analyze(ast)
+        if not quiet:
+            print("\nDirecciones virtuales (globales):")
+            for name, info in gen.global_vars.by_name.items():
+                print(f"  {name} [{info.vtype}] -> {info.addr}")
+            print("\nFunciones:")
+            for f in gen.funcs.all():
+                params = ", ".join([f"{p.name}:{p.vtype}" for p in f.params]) if f.params else "-"
+                print(f"  {f.name}({params}) -> {f.ret_type or 'void'} inicio={f.start_quad} ret={f.ret_addr}")
+            print("\nConstantes:")
+            for (val, t), addr in sorted(gen.memory.const_table.items(), key=lambda kv: kv[1]):
+                print(f"  {repr(val)} [{t}] -> {addr}")
+            print("\nCuadruplos")
+            for i, q in enumerate(quads):
+                print(i, ":", q)
+            if gen.init_report and gen.init_report.warnings:
+                print("\nAdvertencias (la VM revisará cada lectura):")
+                for ip, _, name in gen.init_report.warnings:
+                    print(f"  cuadruplo {ip}: {name} podría no tener valor")
+        vm = None
+        unchecked = bool(gen.init_report and gen.init_report.proven)
+        vm_opts = dict(unchecked=unchecked, blocks=blocks, jobs=jobs, lines=gen.lineas, limits=limits)
         if run_flag:
-            print("\nEjecución")
-            vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table)
-            vm.run()
+            if not quiet:
+                print("\nEjecución")
+            if resume:
+                vm = VirtualMachine.restore(resume, quads, gen.funcs, gen.memory.const_table, **vm_opts)
+            else:
+                vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, **vm_opts)
+            if checkpoint:
+                vm.enable_checkpoints(checkpoint, every=int(checkpoint_every) if checkpoint_every else None)
+            if debug:
+                Debugger(vm, gen).repl()
+            elif perfil:
+                prof = LineProfiler(vm, gen.lineas)
+                prof.run()
+                prof.report(src, top=perfil_top)
+            elif stats:
+                stats.medir("ejecucion", vm.run)
+            else:
+                vm.run()
+        if stats:
+            stats.reporte(gen, quads, vm)
+    except LimitExceeded as e:
+        # lo que el programa escribió antes del corte ya salió por stdout
+        sys.stdout.flush()
+        print(f"\nEjecución detenida: {e}", file=sys.stderr)
+        print(f"  cuadruplos ejecutados: {e.steps}", file=sys.stderr)
+        print(f"  profundidad de llamadas: {e.depth}", file=sys.stderr)
+        if e.slots is not None:
+            print(f"  slots vivos: {e.slots}", file=sys.stderr)
+        print(f"  detenido en el cuadruplo {e.ip}", file=sys.stderr)
+        raise SystemExit(2)
     except SemanticError as e:
         print("Error semantico:", e)
         raise SystemExit(1)
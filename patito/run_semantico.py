@@ -18,6 +18,8 @@ if __name__ == "__main__":
         gen = QuadGenerator()
         gen.analyze(ast)
         print("OK (cuadruplos generados)")
+        for ip, _, name in gen.init_report.warnings:
+            print(f"Advertencia: cuadruplo {ip}: {name} podría no tener valor")
     except SemanticError as e:
         print("Error semántico:", e)
         raise SystemExit(1)
@@ -1,3 +1,8 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
 import ply.lex as lex
 
 reserved = {
@@ -5,6 +10,7 @@ reserved = {
     'entero':'ENTERO','flotante':'FLOTANTE','nula':'NULA',
     'escribe':'ESCRIBE','imprime':'ESCRIBE','mientras':'MIENTRAS','haz':'HAZ','si':'SI','sino':'SINO',
     'func':'FUNC','finf':'FINF','ret':'RET','regresa':'RET','funcs':'FUNCS',
+    'paralelo':'PARALELO','reduce':'REDUCE',
 }
 
 tokens = (
@@ -65,3 +71,183 @@ def t_error(t):
     raise SyntaxError(f"Caracter ilegal '{t.value[0]}' en línea {t.lexer.lineno}")
 
 def build_lexer(**kw): return lex.lex(**kw)
+
+def tokenize(src, lexer=None):
+    lexer = lexer or build_lexer()
+    lexer.input(src)
+    return list(iter(lexer.token, None))
+
+class TokenReplay:
+    # Entrega al parser tokens ya escaneados (permite medir el parser sin el lexer).
+    def __init__(self, toks):
+        self._it = iter(toks)
+        self.lexdata = None
+    def input(self, src):
+        # solo se guarda el fuente (el parser lo usa para calcular columnas)
+        self.lexdata = src
+    def token(self):
+        return next(self._it, None)
+
+# -- escaneo compacto ----------------------------------------------------------
+# Alternativa a tokenize() para fuentes grandes: en vez de un LexToken por token, un
+# TokenBuffer con arreglos paralelos (tipo, inicio, largo, línea) sobre los bytes UTF-8 del
+# fuente. El texto de cada token se corta del memoryview solo cuando se pide y los
+# identificadores quedan internados. Produce exactamente los mismos tokens que el lexer de PLY:
+# las reglas salen de las mismas definiciones t_* de arriba y en el mismo orden.
+
+def _reglas():
+    # como PLY: primero las funciones en orden de definición, luego las cadenas de la más larga
+    # a la más corta; los grupos internos se vuelven no capturantes (se usa lastindex)
+    g = globals()
+    funcs = sorted((v for k, v in g.items() if k.startswith('t_') and callable(v) and k != 't_error'),
+                   key=lambda f: f.__code__.co_firstlineno)
+    reglas = [(f.__name__[2:], f.__doc__) for f in funcs]
+    cadenas = [(k[2:], v) for k, v in g.items() if k.startswith('t_') and isinstance(v, str) and k != 't_ignore']
+    reglas += sorted(cadenas, key=lambda kv: len(kv[1]), reverse=True)
+    reglas += [('_ignora', f"[{re.escape(t_ignore)}]+"), ('_error', r'(?s:.)')]
+    return [(name, re.sub(r'(?<!\\)\((?!\?)', '(?:', rx)) for name, rx in reglas]
+
+_REGLAS = _reglas()
+# los espacios antes de un token van en el mismo match; el grupo _ignora queda para los finales
+_MASTER = re.compile((f"[{re.escape(t_ignore)}]*(?:"
+                      + "|".join(f"(?P<{n}>{rx})" for n, rx in _REGLAS) + ")").encode())
+KINDS = tuple(tokens)
+_KIND = {name: i for i, name in enumerate(KINDS)}
+# por grupo del patrón maestro: código de tipo, o None si no produce token
+_GROUP_KIND = [None] + [_KIND.get(n) for n, _ in _REGLAS]
+_G_NEWLINE = 1 + [n for n, _ in _REGLAS].index('newline')
+_G_ERROR = len(_REGLAS)
+_ID, _ENT, _FLOT, _LETRERO = _KIND['ID'], _KIND['CTE_ENT'], _KIND['CTE_FLOT'], _KIND['LETRERO']
+_RESERVED = {k.encode(): _KIND[v] for k, v in reserved.items()}
+# valor de los tokens cuya regla es un literal (operadores y signos): no hace falta cortarlo
+_FIXED = [None] * len(KINDS)
+for _n, _rx in _REGLAS:
+    if _n in _KIND and not re.search(r'(?<!\\)[][.*+?{}|^$()]', _rx):
+        _FIXED[_KIND[_n]] = re.sub(r'\\(.)', r'\1', _rx)
+
+
+class TokenBuffer:
+    """Tokens como arreglos paralelos; `value(i)` arma el valor del token i bajo demanda."""
+
+    def __init__(self, src):
+        self.src = src
+        self.data = src.encode('utf-8')
+        self.view = memoryview(self.data)
+        self.kinds = array('B')
+        self.starts = array('I')     # offset en bytes
+        self.lengths = array('I')
+        self.lines = array('I')
+        self.ids = array('i')        # índice en `names` (identificadores y reservadas) o -1
+        self.names = []
+        self._continuations = None   # offsets de bytes de continuación UTF-8 (fuente no ASCII)
+        self._ascii = src.isascii()
+        self._scan()
+
+    def _scan(self):
+        add_kind, add_start, add_len = self.kinds.append, self.starts.append, self.lengths.append
+        add_line, add_id = self.lines.append, self.ids.append
+        symbols, names, group_kind, reserved_kind = {}, self.names, _GROUP_KIND, _RESERVED
+        newline, error = _G_NEWLINE, _G_ERROR
+        lineno = 1
+        for m in _MASTER.finditer(self.data):
+            g = m.lastindex
+            kind = group_kind[g]
+            if kind is None:
+                if g == newline:
+                    lineno += m.end() - m.start(g)
+                elif g == error:
+                    pos = self._char_pos(m.start(g))
+                    raise SyntaxError(f"Caracter ilegal '{self.src[pos]}' en línea {lineno}")
+                continue
+            start, end = m.span(g)
+            if kind == _ID:
+                raw = m[g]
+                sym = symbols.get(raw)
+                if sym is None:
+                    sym = symbols[raw] = len(names)
+                    names.append(sys.intern(raw.decode('ascii')))
+                kind = reserved_kind.get(raw, _ID)
+                add_id(sym)
+            else:
+                add_id(-1)
+            add_kind(kind)
+            add_start(start)
+            add_len(end - start)
+            add_line(lineno)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, i):
+        return KINDS[self.kinds[i]]
+
+    def text(self, i):
+        s = self.starts[i]
+        return self.view[s:s + self.lengths[i]]
+
+    def value(self, i):
+        sym = self.ids[i]
+        if sym >= 0:
+            return self.names[sym]
+        return self._value(self.kinds[i], self.starts[i], self.lengths[i])
+
+    def _value(self, kind, start, length):
+        if _FIXED[kind] is not None:
+            return _FIXED[kind]
+        raw = self.view[start:start + length]
+        if kind == _ENT:
+            return int(raw)
+        if kind == _FLOT:
+            return float(raw)
+        # LETRERO: mismo resultado que t_LETRERO; sin escapes basta decodificar byte a byte
+        raw = raw[1:-1].tobytes()
+        return raw.decode('unicode_escape') if b'\\' in raw else raw.decode('latin-1')
+
+    def _char_pos(self, offset):
+        # lexpos de PLY cuenta caracteres, no bytes
+        if self._ascii:
+            return offset
+        if self._continuations is None:
+            self._continuations = array('I', (i for i, b in enumerate(self.data) if 0x80 <= b < 0xC0))
+        return offset - bisect_left(self._continuations, offset)
+
+    def lexer(self):
+        """Adaptador con la interfaz de lexer que espera el parser de PLY."""
+        return BufferLexer(self)
+
+
+class _Token:
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+
+class BufferLexer:
+    # entrega los tokens de un TokenBuffer uno a uno; el objeto token se crea solo al pedirlo
+    def __init__(self, buf):
+        self.buf = buf
+        self.lexdata = buf.src
+        # el parser de PLY toma lexer.token una sola vez: el __next__ de un generador es lo más barato
+        self.token = self._tokens().__next__
+
+    def input(self, src):
+        self.lexdata = src
+
+    def _tokens(self):
+        buf = self.buf
+        names, value, char_pos = buf.names, buf._value, (None if buf._ascii else buf._char_pos)
+        for kind, sym, line, start, length in zip(buf.kinds, buf.ids, buf.lines, buf.starts, buf.lengths):
+            tok = _Token()
+            tok.type = KINDS[kind]
+            tok.value = names[sym] if sym >= 0 else (_FIXED[kind] or value(kind, start, length))
+            tok.lineno = line
+            tok.lexpos = char_pos(start) if char_pos else start
+            yield tok
+        while True:
+            yield None
+
+
+def scan(src):
+    """Escanea `src` a un TokenBuffer; `parser.parse(src, lexer=scan(src).lexer())`."""
+    return TokenBuffer(src)
@@ -0,0 +1,61 @@
+"""Planificador cooperativo: intercala muchas VMs en un solo hilo, un cuanto de cuádruplos a la vez.
+
+    sched = Scheduler(quantum=500)
+    for src in programas:
+        gen = QuadGenerator(); quads = gen.analyze(parse_text(src))
+        sched.add(VirtualMachine(quads, gen.funcs, gen.memory.const_table, output=io.StringIO()))
+    sched.run()                      # o: await sched.run_async() dentro de un loop de asyncio
+
+Una VM que falla no detiene a las demás: queda en `failed` junto con su excepción.
+"""
+import asyncio
+from collections import deque
+
+
+class Scheduler:
+    def __init__(self, quantum=1000):
+        self.quantum = quantum
+        self.ready = deque()
+        self.done = []
+        self.failed = []
+
+    def add(self, vm):
+        self.ready.append(vm)
+        return vm
+
+    def tick(self):
+        """Da un cuanto a la siguiente VM lista (round-robin); regresa True si quedan VMs vivas."""
+        if not self.ready:
+            return False
+        vm = self.ready.popleft()
+        try:
+            alive = vm.step(self.quantum)
+        except Exception as e:
+            self.failed.append((vm, e))
+        else:
+            (self.ready if alive else self.done).append(vm)
+        return bool(self.ready)
+
+    def run(self):
+        while self.tick():
+            pass
+        return self.done
+
+    async def run_async(self):
+        """Corre todas las VMs listas como tareas de asyncio que ceden el loop entre cuantos."""
+        vms = list(self.ready)
+        self.ready.clear()
+        results = await asyncio.gather(*(run_async(vm, self.quantum) for vm in vms), return_exceptions=True)
+        for vm, res in zip(vms, results):
+            if isinstance(res, Exception):
+                self.failed.append((vm, res))
+            else:
+                self.done.append(vm)
+        return self.done
+
+
+async def run_async(vm, quantum=1000):
+    """Ejecuta `vm` dentro de asyncio cediendo el loop cada `quantum` cuádruplos."""
+    while vm.step(quantum):
+        await asyncio.sleep(0)
+    return vm
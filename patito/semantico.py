@@ -1,3 +1,6 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -52,11 +55,13 @@ class FuncDirectory:
         return self.funcs.values()
 
 class VirtualMemory:
+    # Cada (segmento, tipo) ocupa SPAN direcciones consecutivas a partir de su base.
+    SPAN = 1_000_000
     BASES = {
-        'global': {ENTERO: 1000, FLOTANTE: 2000, STRING: 3000, BOOL: 4000},
-        'temp':   {ENTERO: 5000, FLOTANTE: 6000, STRING: 7000, BOOL: 8000},
-        'const':  {ENTERO: 9000, FLOTANTE: 10000, STRING: 11000, BOOL: 12000},
-        'local':  {ENTERO: 13000, FLOTANTE: 14000, STRING: 15000, BOOL: 16000},
+        'global': {ENTERO: 1 * SPAN, FLOTANTE: 2 * SPAN, STRING: 3 * SPAN, BOOL: 4 * SPAN},
+        'temp':   {ENTERO: 5 * SPAN, FLOTANTE: 6 * SPAN, STRING: 7 * SPAN, BOOL: 8 * SPAN},
+        'const':  {ENTERO: 9 * SPAN, FLOTANTE: 10 * SPAN, STRING: 11 * SPAN, BOOL: 12 * SPAN},
+        'local':  {ENTERO: 13 * SPAN, FLOTANTE: 14 * SPAN, STRING: 15 * SPAN, BOOL: 16 * SPAN},
     }
 
     def __init__(self):
@@ -67,6 +72,8 @@ class VirtualMemory:
         if vtype not in self.BASES[segment]:
             raise SemanticError(f"Tipo '{vtype}' no soportado en memoria {segment}")
         idx = self.counters[segment][vtype]
+        if idx >= self.SPAN:
+            raise SemanticError(f"Memoria agotada: más de {self.SPAN} direcciones {vtype} en segmento {segment}")
         addr = self.BASES[segment][vtype] + idx
         self.counters[segment][vtype] += 1
         return addr
@@ -93,6 +100,107 @@ class VirtualMemory:
         self.const_table[key] = addr
         return addr
 
+REDUCCIONES = ('suma', 'min', 'max')
+_GLOBAL_SPANS = {base // VirtualMemory.SPAN for base in VirtualMemory.BASES['global'].values()}
+
+def _assigned_names(stats):
+    out = set()
+    work = list(stats)
+    while work:
+        st = work.pop()
+        tag = st[0]
+        if tag == 'asigna':
+            out.add(st[1])
+        elif tag == 'si':
+            work.extend(st[2][1])
+            if st[3]:
+                work.extend(st[3][1])
+        elif tag == 'mientras':
+            work.extend(st[2][1])
+        elif tag == 'paralelo':
+            out.add(st[1])
+            work.extend(st[6][1])
+    return out
+
+def _called_names(cuerpo):
+    # funciones que llama un cuerpo (argumentos y cuerpos anidados incluidos), en orden de aparición
+    work = [cuerpo]
+    while work:
+        st = work.pop()
+        tag = st[0]
+        if tag == 'cuerpo':
+            work.extend(reversed(st[1]))
+            continue
+        if tag == 'asigna':
+            exprs, bodies = [st[2]], []
+        elif tag == 'imprime':
+            exprs, bodies = st[1], []
+        elif tag == 'call':
+            exprs, bodies = [st], []
+        elif tag == 'ret':
+            exprs, bodies = [st[1]] if st[1] else [], []
+        elif tag == 'si':
+            exprs, bodies = [st[1]], [st[2], st[3]] if st[3] else [st[2]]
+        elif tag == 'mientras':
+            exprs, bodies = [st[1]], [st[2]]
+        elif tag == 'paralelo':
+            exprs, bodies = [st[2], st[4]], [st[6]]
+        else:
+            continue
+        for expr in exprs:
+            for kind, name in _expr_names(expr):
+                if kind == 'call':
+                    yield name
+        work.extend(reversed(bodies))
+
+def _expr_names(node):
+    # ('id', nombre) y ('call', nombre) que aparecen en una expresión (incluye argumentos),
+    # de izquierda a derecha
+    work = [node]
+    while work:
+        node = work.pop()
+        tag = node[0]
+        if tag == 'id':
+            yield 'id', node[1]
+        elif tag == 'call':
+            yield 'call', node[1]
+            work.extend(reversed(node[2] or []))
+        elif tag in ('bin', 'rel'):
+            work.append(node[3])
+            work.append(node[2])
+        elif tag == 'un':
+            work.append(node[2])
+
+def _suma_operand(name, expr):
+    # s = s + e  |  s = e + s  |  s = s - e  ->  e (sin leer s); cualquier otra forma -> None
+    if expr[0] != 'bin' or expr[1] not in ('+', '-'):
+        return None
+    _, op, l, r = expr
+    if l == ('id', name):
+        rest = r
+    elif op == '+' and r == ('id', name):
+        rest = l
+    else:
+        return None
+    if any(n == ('id', name) for n in _expr_names(rest)):
+        return None
+    return rest
+
+def _minmax_operand(reductions, cond, then, sino):
+    # si (e < m) { m = e; } (min) | si (e > m) { m = e; } (max) -> (m, e); otra forma -> None
+    if sino or cond[0] != 'rel' or len(then[1]) != 1 or then[1][0][0] != 'asigna':
+        return None
+    _, name, expr = then[1][0]
+    op = reductions.get(name)
+    if op not in ('min', 'max'):
+        return None
+    _, rop, l, r = cond
+    if rop != ('<' if op == 'min' else '>') or r != ('id', name) or l != expr:
+        return None
+    if any(n == ('id', name) for n in _expr_names(expr)):
+        return None
+    return name, expr
+
 ARIT = {"+","-","*","/"}
 RELOP = {"<",">","<=",">=","==","!="}
 SEMANTIC_CUBE = {}
@@ -150,13 +258,19 @@ class SemanticAnalyzerMin:
                 self.vars.declare(name, vtype, addr)
 
     def _handle_cuerpo(self, cuerpo_node):
-        _, stats = cuerpo_node
-        for st in stats:
-            self._handle_stat(st)
+        # pila explícita: si/mientras anidados apilan sus cuerpos en lugar de recursar
+        work = [cuerpo_node]
+        while work:
+            item = work.pop()
+            if isinstance(item, tuple) and item[0] == 'cuerpo':
+                work.extend(reversed(item[1]))
+            else:
+                work.extend(reversed(self._handle_stat(item)))
 
     def _handle_stat(self, st):
+        # Revisa un estatuto; regresa los cuerpos anidados que faltan por revisar, en orden.
         if not isinstance(st, tuple): 
-            return
+            return []
         tag = st[0]
         if tag == 'asigna':
             _, name, expr = st
@@ -175,50 +289,65 @@ class SemanticAnalyzerMin:
             t = self._type_of(cond)
             if t != BOOL:
                 raise SemanticError(f"La condición de 'si' debe ser bool (no {t})")
-            self._handle_cuerpo(cuerpo)
-            if sino: self._handle_cuerpo(sino)
+            return [cuerpo, sino] if sino else [cuerpo]
         elif tag == 'mientras':
             _, cond, cuerpo = st
             t = self._type_of(cond)
             if t != BOOL:
                 raise SemanticError(f"La condición de 'mientras' debe ser bool (no {t})")
-            self._handle_cuerpo(cuerpo)
+            return [cuerpo]
+        return []
 
     def _type_of(self, node):
-        if isinstance(node, tuple):
+        # Postorden con pila explícita: los operadores esperan como marcas ('!', nodo) hasta
+        # que los tipos de sus operandos están en `types`.
+        work = [node]
+        types = []
+        while work:
+            node = work.pop()
+            if not isinstance(node, tuple):
+                raise SemanticError("Expresión inválida")
             tag = node[0]
-            if tag == 'cte':
+            if tag == '!':
+                node = node[1]
+                op = node[1]
+                if node[0] == 'un':
+                    t = types[-1]
+                    if t not in (ENTERO, FLOTANTE):
+                        raise SemanticError(f"Operador unario '{op}' no aplica a {t}")
+                    continue
+                rt = types.pop()
+                lt = types.pop()
+                res = result_type(op, lt, rt)
+                if not res:
+                    raise SemanticError(f"Operación inválida: {lt} {op} {rt}")
+                types.append(res)
+            elif tag == 'cte':
                 val = node[1]
-                if isinstance(val, int): return ENTERO
-                if isinstance(val, float): return FLOTANTE
-                if isinstance(val, str): return STRING
+                if isinstance(val, int):
+                    types.append(ENTERO)
+                elif isinstance(val, float):
+                    types.append(FLOTANTE)
+                elif isinstance(val, str):
+                    types.append(STRING)
+                else:
+                    raise SemanticError("Expresión inválida")
             elif tag == 'id':
                 name = node[1]
                 vinfo = self.vars.lookup(name)
                 if not vinfo:
                     raise SemanticError(f"Variable '{name}' no declarada")
-                return vinfo.vtype
-            elif tag == 'bin':
-                _, op, l, r = node
-                lt, rt = self._type_of(l), self._type_of(r)
-                res = result_type(op, lt, rt)
-                if not res:
-                    raise SemanticError(f"Operación inválida: {lt} {op} {rt}")
-                return res
-            elif tag == 'rel':
-                _, op, l, r = node
-                lt, rt = self._type_of(l), self._type_of(r)
-                res = result_type(op, lt, rt)
-                if not res:
-                    raise SemanticError(f"Operación inválida: {lt} {op} {rt}")
-                return res
+                types.append(vinfo.vtype)
+            elif tag == 'bin' or tag == 'rel':
+                work.append(('!', node))
+                work.append(node[3])
+                work.append(node[2])
             elif tag == 'un':
-                _, op, arg = node
-                t = self._type_of(arg)
-                if t not in (ENTERO, FLOTANTE):
-                    raise SemanticError(f"Operador unario '{op}' no aplica a {t}")
-                return t
-        raise SemanticError("Expresión inválida")
+                work.append(('!', node))
+                work.append(node[2])
+            else:
+                raise SemanticError("Expresión inválida")
+        return types[-1]
 
     def _assign_ok(self, ltype, rtype):
         if ltype == rtype: 
@@ -227,9 +356,70 @@ class SemanticAnalyzerMin:
             return True
         return False
 
+@dataclass
+class FuncBlock:
+    # Cuádruplos de una función generados como si empezara en el índice 0: los saltos son
+    # relativos al bloque, las constantes usan direcciones locales y los GOSUB quedan pendientes.
+    name: str
+    quads: list
+    consts: dict
+    gosubs: dict
+    params: list
+    vars: VarTable
+    locals_count: dict
+    temps_count: dict
+    temp_tally: dict
+    par_calls: set
+    lineas: array
+    columnas: array
+
+_worker_ctx = None
+
+def _init_codegen_worker(funcs, global_vars):
+    global _worker_ctx
+    _worker_ctx = (funcs, global_vars)
+
+def _isolated_gen(funcs, global_vars, func_node):
+    # genera una función en un QuadGenerator aparte que comparte directorio y globales
+    gen = QuadGenerator()
+    gen.funcs = funcs
+    gen.global_vars = gen.current_vars = global_vars
+    gen._gen_func(func_node)
+    return gen
+
+def _gen_func_block(func_node):
+    funcs, global_vars = _worker_ctx
+    gen = _isolated_gen(funcs, global_vars, func_node)
+    finfo = funcs.get(func_node[1])
+    # el inicio real se conoce hasta fusionar; así los GOSUB de este worker siguen pendientes
+    finfo.start_quad = None
+    return FuncBlock(finfo.name, gen.cuadruplos, gen.memory.const_table, gen._pending_gosubs,
+                     finfo.params, finfo.vars, finfo.locals_count, finfo.temps_count, gen.temp_tally,
+                     gen._par_calls, gen.lineas, gen.columnas)
+
 class QuadGenerator(SemanticAnalyzerMin):
-    def __init__(self):
+    # Con jobs > 1 y al menos estas funciones, los cuerpos se generan en un pool de procesos.
+    PARALLEL_MIN_FUNCS = 32
+
+    def __init__(self, jobs=1, check_init=True, inputs=(), tail_calls=True, fold_steps=100_000, cse=True,
+                 strict=False):
         super().__init__()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.check_init = check_init
+        self.tail_calls = tail_calls
+        # pasos de VM para evaluar al compilar llamadas puras con argumentos conocidos (0 = no)
+        self.fold_steps = fold_steps
+        self.folded_calls = 0
+        # reutiliza subexpresiones repetidas dentro de cada tramo en línea recta
+        self.cse = cse
+        self.cse_reused = 0
+        # solo se generan las funciones alcanzables desde main; con strict las demás también
+        # se revisan (tipos, declaraciones), pero sus cuádruplos se descartan
+        self.strict = strict
+        self.dead_funcs = ()
+        # globales que llegan con valor desde fuera (batch.BatchVM): cuentan como asignadas
+        self.inputs = tuple(inputs)
+        self.init_report = None
         self.funcs = FuncDirectory()
         self.global_vars = VarTable()
         self.current_vars = self.global_vars
@@ -238,9 +428,29 @@ class QuadGenerator(SemanticAnalyzerMin):
         self.pilaTipos = []
         self.pilaOp = []
         self.cuadruplos = []
+        # posición en el fuente de cada cuádruplo, en arreglos paralelos a `cuadruplos`
+        # (0 = sin posición); así las tuplas del ciclo de la VM no crecen
+        self.lineas = array('i')
+        self.columnas = array('i')
+        self._pos = (0, 0)
         self.temp_tally = {ENTERO: 0, FLOTANTE: 0, STRING: 0, BOOL: 0}
         self.main_temp_usage = _zero_counts()
         self._pending_gosubs = {}
+        self._in_paralelo = False
+        self._par_calls = set()   # funciones llamadas dentro de 'paralelo'
+
+    def _emit(self, quad):
+        self.cuadruplos.append(quad)
+        self.lineas.append(self._pos[0])
+        self.columnas.append(self._pos[1])
+
+    def _at(self, node):
+        # fija la posición de los siguientes cuádruplos; regresa la anterior para restaurarla
+        prev = self._pos
+        linea = getattr(node, 'linea', 0)
+        if linea:
+            self._pos = (linea, node.columna)
+        return prev
 
     def new_temp(self, vtype):
         self.temp_tally[vtype] += 1
@@ -254,12 +464,26 @@ class QuadGenerator(SemanticAnalyzerMin):
         self._predeclare_funcs(func_nodes)
         # variables globales
         self._handle_vars(vars_node, scope='global', vtable=self.global_vars)
+        for n in self.inputs:
+            if not self.global_vars.lookup(n):
+                raise SemanticError(f"Entrada '{n}' no es una variable global")
+        live = self._reachable_funcs(func_nodes, cuerpo_node)
+        live_names = {fn[1] for fn in live}
+        self.dead_funcs = tuple(fn[1] for fn in func_nodes if fn[1] not in live_names)
+        self._alloc_ret_slots(fn[1] for fn in live)
         # salto inicial a main
-        self.cuadruplos.append(('GOTO', None, None, None))
+        self._emit(('GOTO', None, None, None))
         jump_main_idx = 0
         # generar funciones
-        for fn in func_nodes:
-            self._gen_func(fn)
+        if self.jobs > 1 and len(live) >= self.PARALLEL_MIN_FUNCS:
+            self._gen_funcs_parallel(live)
+        else:
+            for fn in live:
+                self._gen_func(fn)
+        if self.strict:
+            for fn in func_nodes:
+                if fn[1] not in live_names:
+                    self._check_dead_func(fn)
         # generar main como cuerpo global
         self.memory.reset_locals()
         self.current_vars = self.global_vars
@@ -269,6 +493,18 @@ class QuadGenerator(SemanticAnalyzerMin):
         self._gen_cuerpo(cuerpo_node)
         self.main_temp_usage = self.memory.usage('temp')
         self._patch_pending_gosubs()
+        self._check_par_calls()
+        if self.fold_steps:
+            from plegado import fold_pure_calls
+            self.folded_calls = fold_pure_calls(self, self.fold_steps)
+        if self.cse:
+            from numeracion import number_values
+            self.cse_reused = number_values(self)
+        if self.tail_calls:
+            self._mark_tail_calls()
+        if self.check_init:
+            from inicializacion import analyze_init
+            self.init_report = analyze_init(self)
         return self.cuadruplos
 
     def _predeclare_funcs(self, func_nodes):
@@ -279,6 +515,64 @@ class QuadGenerator(SemanticAnalyzerMin):
             param_types = [p[1][1] for p in params] if params else []
             self.funcs.declare(name, ret_type, param_types)
 
+    def _reachable_funcs(self, func_nodes, cuerpo_node):
+        # Nodos de las funciones alcanzables desde main por el grafo de llamadas, en el orden
+        # en que se piden por primera vez (main, luego lo que llama cada función descubierta).
+        by_name = {fn[1]: fn for fn in func_nodes}
+        live, seen = [], set()
+        body, k = cuerpo_node, 0
+        while body is not None:
+            for name in _called_names(body):
+                if name in by_name and name not in seen:
+                    seen.add(name)
+                    live.append(by_name[name])
+            body = live[k][5] if k < len(live) else None
+            k += 1
+        return live
+
+    def _check_dead_func(self, func_node):
+        _isolated_gen(self.funcs, self.global_vars, func_node)
+        self.funcs.get(func_node[1]).start_quad = None
+
+    def _alloc_ret_slots(self, names):
+        # Las casillas de retorno se reservan antes de generar cuerpos: así una llamada a una
+        # función definida más abajo ya conoce su dirección de retorno.
+        for name in names:
+            finfo = self.funcs.get(name)
+            if finfo.ret_type:
+                finfo.ret_addr = self.memory.alloc_var(finfo.ret_type, scope='global')
+
+    def _gen_funcs_parallel(self, func_nodes):
+        chunk = max(1, len(func_nodes) // (self.jobs * 4))
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_codegen_worker,
+                                 initargs=(self.funcs, self.global_vars)) as pool:
+            for block in pool.map(_gen_func_block, func_nodes, chunksize=chunk):
+                self._merge_block(block)
+
+    def _merge_block(self, block):
+        offset = len(self.cuadruplos)
+        # constantes en orden de aparición: mismas direcciones que la generación secuencial
+        remap = {local: self.memory.alloc_const(*key)
+                 for key, local in sorted(block.consts.items(), key=lambda kv: kv[1])}
+        for op, l, r, res in block.quads:
+            # una llamada a sí misma ya trae destino (el inicio del bloque); las demás siguen pendientes
+            if op in ('GOTO', 'GOTOF', 'PAR') or (op == 'GOSUB' and res is not None):
+                res += offset
+            self.cuadruplos.append((op, remap.get(l, l), remap.get(r, r), res))
+        self.lineas.extend(block.lineas)
+        self.columnas.extend(block.columnas)
+        for fname, idxs in block.gosubs.items():
+            self._pending_gosubs.setdefault(fname, []).extend(i + offset for i in idxs)
+        finfo = self.funcs.get(block.name)
+        finfo.start_quad = offset
+        finfo.params = block.params
+        finfo.vars = block.vars
+        finfo.locals_count = block.locals_count
+        finfo.temps_count = block.temps_count
+        for t, n in block.temp_tally.items():
+            self.temp_tally[t] += n
+        self._par_calls |= block.par_calls
+
     def _patch_pending_gosubs(self):
         for fname, idxs in self._pending_gosubs.items():
             finfo = self.funcs.get(fname)
@@ -288,6 +582,58 @@ class QuadGenerator(SemanticAnalyzerMin):
                 op, a, b, _ = self.cuadruplos[i]
                 self.cuadruplos[i] = (op, a, b, finfo.start_quad)
 
+    def _compact(self, drop):
+        # quita los cuádruplos de `drop` y recorre saltos, llamadas, inicios de función y las
+        # tablas de posición; un destino que se quitó pasa al siguiente cuádruplo que queda
+        if not drop:
+            return
+        q = self.cuadruplos
+        new_index = array('i', bytes(4 * (len(q) + 1)))
+        kept = 0
+        for i in range(len(q)):
+            new_index[i] = kept
+            if i not in drop:
+                kept += 1
+        new_index[len(q)] = kept
+        out, lineas, columnas = [], array('i'), array('i')
+        for i, (op, l, r, res) in enumerate(q):
+            if i in drop:
+                continue
+            if op in ('GOTO', 'GOTOF', 'PAR', 'GOSUB', 'TAILCALL') and res is not None:
+                res = new_index[res]
+            out.append((op, l, r, res))
+            lineas.append(self.lineas[i])
+            columnas.append(self.columnas[i])
+        q[:] = out
+        self.lineas, self.columnas = lineas, columnas
+        for finfo in self.funcs.all():
+            if finfo.start_quad is not None:
+                finfo.start_quad = new_index[finfo.start_quad]
+
+    def _mark_tail_calls(self):
+        # GOSUB cuyo resultado solo se regresa ('=' del valor + RET, o llegar a ENDFUNC/RET vacío
+        # tras GOTOs): pasa a TAILCALL, que reemplaza el marco actual en lugar de apilar otro.
+        # res del TAILCALL es el inicio de la función, r el slot de retorno que espera quien
+        # llamó (None si el valor se descarta). Los cuádruplos que seguían se quedan: no cambia
+        # ningún salto y quien no haga TCO puede tratar TAILCALL como GOSUB.
+        q = self.cuadruplos
+        n = len(q)
+        for i, (op, name, _, target) in enumerate(q):
+            if op != 'GOSUB':
+                continue
+            finfo = self.funcs.get(name)
+            nxt = q[i + 1] if i + 1 < n else None
+            if (nxt and nxt[0] == '=' and nxt[1] == finfo.ret_addr and i + 2 < n
+                    and q[i + 2][0] == 'RET' and q[i + 2][1] == nxt[3] and q[i + 2][3] is not None):
+                q[i] = ('TAILCALL', name, q[i + 2][3], target)
+                continue
+            j, seen = i + 1, set()
+            while j < n and q[j][0] == 'GOTO' and j not in seen:
+                seen.add(j)
+                j = q[j][3]
+            if j < n and (q[j][0] == 'ENDFUNC' or q[j] == ('RET', None, None, None)):
+                q[i] = ('TAILCALL', name, None, target)
+
     def _handle_vars(self, vars_node, scope='global', vtable=None):
         if not vars_node: 
             return
@@ -313,11 +659,9 @@ class QuadGenerator(SemanticAnalyzerMin):
         if not finfo:
             raise SemanticError(f"Función '{name}' no declarada")
         self.memory.reset_locals()
+        self._at(func_node)
         self.current_func = name
         self.current_vars = finfo.vars
-        # return slot
-        if finfo.ret_type:
-            finfo.ret_addr = self.memory.alloc_var(finfo.ret_type, scope='global')
         # params
         if params:
             for (pname, ptipo), ptype in zip(params, finfo.param_types):
@@ -334,7 +678,7 @@ class QuadGenerator(SemanticAnalyzerMin):
         self._gen_cuerpo(cuerpo_node)
         finfo.locals_count = self.memory.usage('local')
         finfo.temps_count = self.memory.usage('temp')
-        self.cuadruplos.append(('ENDFUNC', None, None, None))
+        self._emit(('ENDFUNC', None, None, None))
         self.current_func = None
         self.current_vars = self.global_vars
 
@@ -347,13 +691,32 @@ class QuadGenerator(SemanticAnalyzerMin):
         tag = cuerpo_node[0]
         if tag != 'cuerpo':
             raise SemanticError("Nodo de cuerpo inválido")
-        stats = cuerpo_node[1]
-        for st in stats:
-            self._gen_stat(st)
+        self._gen_stats(cuerpo_node[1])
 
     def _gen_stat(self, st):
-        if not isinstance(st, tuple):
-            return
+        self._gen_stats([st])
+
+    def _gen_stats(self, stats):
+        # Pila explícita en lugar de recursión: contiene estatutos por generar y acciones
+        # pendientes (parchar saltos, restaurar la posición); el anidamiento de si/mientras
+        # solo está limitado por la memoria.
+        work = list(reversed(stats))
+        while work:
+            item = work.pop()
+            if callable(item):
+                item()
+            elif isinstance(item, tuple):
+                prev = self._at(item)
+                work.append(lambda prev=prev: setattr(self, '_pos', prev))
+                self._gen_stat_at(item, work)
+
+    def _push_cuerpo(self, work, cuerpo_node):
+        if cuerpo_node[0] != 'cuerpo':
+            raise SemanticError("Nodo de cuerpo inválido")
+        work.extend(reversed(cuerpo_node[1]))
+
+    def _gen_stat_at(self, st, work):
+        # Genera lo que va antes de los cuerpos anidados y apila cuerpos y acciones de cierre.
         tag = st[0]
         if tag == 'asigna':
             _, name, expr = st
@@ -364,13 +727,13 @@ class QuadGenerator(SemanticAnalyzerMin):
             res, t = self._gen_expr(expr)
             if not self._assign_ok(vinfo.vtype, t):
                 raise SemanticError(f"Tipos incompatibles en asignación a '{name}'")
-            self.cuadruplos.append(('=', res, None, vinfo.addr))
+            self._emit(('=', res, None, vinfo.addr))
         elif tag == 'imprime':
             _, items = st
             for item in items:
                 self._reset_stacks()
                 res, t = self._gen_expr(item)
-                self.cuadruplos.append(('PRINT', res, None, None))
+                self._emit(('PRINT', res, None, None))
         elif tag == 'call':
             self._emit_call(st, expect_value=False)
         elif tag == 'ret':
@@ -381,17 +744,22 @@ class QuadGenerator(SemanticAnalyzerMin):
             cond_addr, cond_type = self._gen_expr(cond)
             if cond_type != BOOL:
                 raise SemanticError("La condición de 'si' debe ser bool")
-            self.cuadruplos.append(('GOTOF', cond_addr, None, None))
+            self._emit(('GOTOF', cond_addr, None, None))
             gotof_idx = len(self.cuadruplos) - 1
-            self._gen_cuerpo(cuerpo)
-            if sino:
-                self.cuadruplos.append(('GOTO', None, None, None))
-                end_idx = len(self.cuadruplos) - 1
-                self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
-                self._gen_cuerpo(sino)
-                self.cuadruplos[end_idx] = ('GOTO', None, None, len(self.cuadruplos))
-            else:
-                self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
+
+            def close_then():
+                if sino:
+                    self._emit(('GOTO', None, None, None))
+                    end_idx = len(self.cuadruplos) - 1
+                    self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
+                    work.append(lambda: self._patch_jump(end_idx, ('GOTO', None, None)))
+                    self._push_cuerpo(work, sino)
+                else:
+                    self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
+            work.append(close_then)
+            self._push_cuerpo(work, cuerpo)
+        elif tag == 'paralelo':
+            self._gen_paralelo(st, work)
         elif tag == 'mientras':
             _, cond, cuerpo = st
             loop_start = len(self.cuadruplos)
@@ -399,11 +767,184 @@ class QuadGenerator(SemanticAnalyzerMin):
             cond_addr, cond_type = self._gen_expr(cond)
             if cond_type != BOOL:
                 raise SemanticError("La condición de 'mientras' debe ser bool")
-            self.cuadruplos.append(('GOTOF', cond_addr, None, None))
+            self._emit(('GOTOF', cond_addr, None, None))
             gotof_idx = len(self.cuadruplos) - 1
-            self._gen_cuerpo(cuerpo)
-            self.cuadruplos.append(('GOTO', None, None, loop_start))
-            self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
+
+            def close_loop():
+                self._emit(('GOTO', None, None, loop_start))
+                self.cuadruplos[gotof_idx] = ('GOTOF', cond_addr, None, len(self.cuadruplos))
+            work.append(close_loop)
+            self._push_cuerpo(work, cuerpo)
+
+    def _patch_jump(self, idx, head):
+        # completa el salto `idx` con destino al siguiente cuádruplo
+        self.cuadruplos[idx] = head + (len(self.cuadruplos),)
+
+    def _gen_paralelo(self, st, work):
+        # Se genera como un ciclo normal precedido de PAR; la VM puede repartir [i, b) entre
+        # procesos o ignorar PAR y correrlo en secuencia, con el mismo resultado.
+        _, idx_name, a, cond_name, b, reds, cuerpo = st
+        if self._in_paralelo:
+            raise SemanticError("'paralelo' anidado no está soportado")
+        if cond_name != idx_name:
+            raise SemanticError(f"La condición de 'paralelo' debe comparar el índice '{idx_name}'")
+        idx = self._lookup_var(idx_name)
+        if not idx:
+            raise SemanticError(f"Variable '{idx_name}' no declarada")
+        if idx.vtype != ENTERO:
+            raise SemanticError(f"El índice de 'paralelo' debe ser entero (no {idx.vtype})")
+        reductions = self._check_paralelo_body(idx_name, reds, cuerpo)
+        privates = tuple(self._lookup_var(n).addr for n in sorted(_assigned_names(cuerpo[1]))
+                         if n != idx_name and n not in reductions)
+        self._reset_stacks()
+        lo, lo_t = self._gen_expr(a)
+        self._reset_stacks()
+        hi, hi_t = self._gen_expr(b)
+        if lo_t != ENTERO or hi_t != ENTERO:
+            raise SemanticError("Los límites de 'paralelo' deben ser enteros")
+        self._emit(('=', lo, None, idx.addr))
+        # el límite va en un temporal propio: cada proceso lo reemplaza por el fin de su tramo
+        bound = self.new_temp(ENTERO)
+        self._emit(('=', hi, None, bound))
+        par_idx = len(self.cuadruplos)
+        self._emit(None)
+        loop_start = len(self.cuadruplos)
+        cond = self.new_temp(BOOL)
+        self._emit(('<', idx.addr, bound, cond))
+        self._emit(('GOTOF', cond, None, None))
+        gotof_idx = len(self.cuadruplos) - 1
+        self._in_paralelo = True
+
+        def close_paralelo():
+            self._in_paralelo = False
+            self._emit(('+', idx.addr, self.memory.alloc_const(1, ENTERO), idx.addr))
+            self._emit(('GOTO', None, None, loop_start))
+            end = len(self.cuadruplos)
+            self.cuadruplos[gotof_idx] = ('GOTOF', cond, None, end)
+            red_addrs = tuple((op, self._lookup_var(n).addr) for n, op in reductions.items())
+            self.cuadruplos[par_idx] = ('PAR', (idx.addr, bound), (red_addrs, privates), end)
+        work.append(close_paralelo)
+        self._push_cuerpo(work, cuerpo)
+
+    def _check_paralelo_body(self, idx_name, reds, cuerpo):
+        """Valida que las iteraciones sean independientes; regresa {variable: reducción}.
+
+        Fuera del índice y las reducciones, toda variable escrita en el cuerpo debe recibir
+        valor antes de leerse en la misma iteración (así ninguna vuelta ve lo que dejó otra).
+        Una reducción solo aparece en su actualización: 's = s + e' para suma y
+        'si (e < m) { m = e; }' (o '>' para max) para min/max.
+        """
+        reductions = {}
+        for op, name in reds:
+            if op not in REDUCCIONES:
+                raise SemanticError(f"Reducción '{op}' desconocida (se esperaba {', '.join(REDUCCIONES)})")
+            vinfo = self._lookup_var(name)
+            if not vinfo:
+                raise SemanticError(f"Variable '{name}' no declarada")
+            if vinfo.vtype not in (ENTERO, FLOTANTE):
+                raise SemanticError(f"La reducción '{op}' necesita una variable numérica ('{name}' es {vinfo.vtype})")
+            if name == idx_name or name in reductions:
+                raise SemanticError(f"La variable '{name}' no puede reducirse aquí")
+            reductions[name] = op
+        written = _assigned_names(cuerpo[1])
+        if idx_name in written:
+            raise SemanticError(f"El índice '{idx_name}' no puede asignarse dentro de 'paralelo'")
+
+        def reduction_error(name):
+            if reductions[name] == 'suma':
+                return SemanticError(f"La reducción 'suma' de '{name}' solo admite '{name} = {name} + expr'")
+            rel = '<' if reductions[name] == 'min' else '>'
+            return SemanticError(f"La reducción '{reductions[name]}' de '{name}' solo admite "
+                                 f"'si (expr {rel} {name}) {{ {name} = expr; }}'")
+
+        def check(expr, assigned):
+            for kind, name in _expr_names(expr):
+                if kind == 'call':
+                    self._par_calls.add(name)
+                elif name in reductions:
+                    raise reduction_error(name)
+                elif name == idx_name or name not in written:
+                    continue
+                elif name not in assigned:
+                    raise SemanticError(f"La variable '{name}' se escribe en una iteración de 'paralelo' "
+                                        "y podría leerse en otra")
+
+        # Recorre el cuerpo en orden con pila explícita; `cur[0]` son las variables asignadas
+        # en todos los caminos hasta este punto. Las acciones apiladas cierran cada si/mientras:
+        # tras un si se queda la intersección de sus ramas, tras un mientras lo de antes.
+        cur = [frozenset()]
+        work = list(reversed(cuerpo[1]))
+        while work:
+            st = work.pop()
+            if callable(st):
+                st()
+                continue
+            tag = st[0]
+            if tag == 'asigna':
+                _, name, expr = st
+                if reductions.get(name) == 'suma':
+                    expr = _suma_operand(name, expr)
+                    if expr is None:
+                        raise reduction_error(name)
+                elif name in reductions:
+                    raise reduction_error(name)
+                check(expr, cur[0])
+                cur[0] = cur[0] | {name}
+            elif tag == 'imprime':
+                for item in st[1]:
+                    check(item, cur[0])
+            elif tag == 'call':
+                check(st, cur[0])
+            elif tag == 'ret':
+                raise SemanticError("'ret' no está permitido dentro de 'paralelo'")
+            elif tag == 'si':
+                _, cond, then, sino = st
+                update = _minmax_operand(reductions, cond, then, sino)
+                if update:
+                    # la única forma admitida de min/max: no deja nada asignado en todos los caminos
+                    check(update[1], cur[0])
+                    continue
+                check(cond, cur[0])
+                base = cur[0]
+                if sino:
+                    box = []
+                    work.append(lambda box=box: cur.__setitem__(0, box[0] & cur[0]))
+                    work.extend(reversed(sino[1]))
+                    work.append(lambda base=base, box=box: (box.append(cur[0]), cur.__setitem__(0, base)))
+                else:
+                    work.append(lambda base=base: cur.__setitem__(0, base))
+                work.extend(reversed(then[1]))
+            elif tag == 'mientras':
+                check(st[1], cur[0])
+                work.append(lambda base=cur[0]: cur.__setitem__(0, base))
+                work.extend(reversed(st[2][1]))
+            elif tag == 'paralelo':
+                raise SemanticError("'paralelo' anidado no está soportado")
+        return reductions
+
+    def _check_par_calls(self):
+        # Las funciones llamadas desde 'paralelo' (y las que ellas llamen) no pueden escribir
+        # globales: cada proceso trabaja sobre su copia y esas escrituras se perderían.
+        ret_slots = {f.ret_addr for f in self.funcs.all() if f.ret_addr is not None}
+        pending, seen = list(self._par_calls), set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            finfo = self.funcs.get(name)
+            if not finfo or finfo.start_quad is None:
+                continue
+            i = finfo.start_quad
+            while i < len(self.cuadruplos) and self.cuadruplos[i][0] != 'ENDFUNC':
+                op, l, _, res = self.cuadruplos[i]
+                if op == 'GOSUB':
+                    pending.append(l)
+                elif (op in ARIT or op in RELOP or op == '=') and res not in ret_slots \
+                        and res // VirtualMemory.SPAN in _GLOBAL_SPANS:
+                    raise SemanticError(f"La función '{name}' modifica variables globales y no puede "
+                                        "llamarse dentro de 'paralelo'")
+                i += 1
 
     def _emit_return(self, st):
         if not self.current_func:
@@ -413,7 +954,7 @@ class QuadGenerator(SemanticAnalyzerMin):
         if expr is None:
             if finfo.ret_type:
                 raise SemanticError(f"La función '{finfo.name}' debe regresar {finfo.ret_type}")
-            self.cuadruplos.append(('RET', None, None, None))
+            self._emit(('RET', None, None, None))
             return
         if not finfo.ret_type:
             raise SemanticError(f"La función '{finfo.name}' no debe regresar valor")
@@ -421,32 +962,11 @@ class QuadGenerator(SemanticAnalyzerMin):
         res, t = self._gen_expr(expr)
         if not self._assign_ok(finfo.ret_type, t):
             raise SemanticError(f"Tipo de retorno inválido: se esperaba {finfo.ret_type}, obtuvo {t}")
-        self.cuadruplos.append(('RET', res, None, finfo.ret_addr))
+        self._emit(('RET', res, None, finfo.ret_addr))
 
     def _emit_call(self, st, expect_value=True):
-        _, name, args = st
-        finfo = self.funcs.get(name)
-        if not finfo:
-            raise SemanticError(f"Función '{name}' no declarada")
-        args = args or []
-        if len(args) != len(finfo.param_types):
-            raise SemanticError(f"Función '{name}' espera {len(finfo.param_types)} params, recibió {len(args)}")
-        self.cuadruplos.append(('ERA', name, None, None))
-        for idx, (arg, expected_type) in enumerate(zip(args, finfo.param_types)):
-            res, t = self._eval_arg(arg)
-            if not self._assign_ok(expected_type, t):
-                raise SemanticError(f"Tipo de argumento {idx} inválido en llamada a '{name}'")
-            self.cuadruplos.append(('PARAM', res, None, idx))
-        target_quad = finfo.start_quad
-        if target_quad is None:
-            # se parchea al final
-            self._pending_gosubs.setdefault(name, []).append(len(self.cuadruplos))
-        self.cuadruplos.append(('GOSUB', name, None, target_quad))
-        if finfo.ret_type and expect_value:
-            temp = self.new_temp(finfo.ret_type)
-            self.cuadruplos.append(('=', finfo.ret_addr, None, temp))
-            return temp, finfo.ret_type
-        return None, None
+        # Una llamada como estatuto: mismo recorrido que una llamada dentro de una expresión.
+        self._walk_expr(st, expect_value)
 
     def _gen_expr(self, node):
         self._walk_expr(node)
@@ -457,52 +977,91 @@ class QuadGenerator(SemanticAnalyzerMin):
         self.pilaOp.clear()
         return res, t
 
-    def _walk_expr(self, node):
-        if not isinstance(node, tuple):
-            raise SemanticError("Nodo de expresión inválido")
-        tag = node[0]
-        if tag == 'cte':
-            val = node[1]
-            if isinstance(val, int):
-                t = ENTERO
-            elif isinstance(val, float):
-                t = FLOTANTE
-            elif isinstance(val, bool):
-                t = BOOL
+    def _walk_expr(self, node, expect_value=True):
+        # Recorrido en postorden con pila explícita: los nodos se expanden y los operadores se
+        # apilan como marcas ('!bin', op), así una expresión de 100k términos no agota la pila
+        # de Python. Los argumentos de una llamada dejan su resultado en pilaO y '!param' lo
+        # consume, en el mismo orden en que se emitían con la versión recursiva.
+        work = [node]
+        while work:
+            item = work.pop()
+            if not isinstance(item, tuple):
+                raise SemanticError("Nodo de expresión inválido")
+            tag = item[0]
+            if tag == 'cte':
+                val = item[1]
+                if isinstance(val, int):
+                    t = ENTERO
+                elif isinstance(val, float):
+                    t = FLOTANTE
+                elif isinstance(val, bool):
+                    t = BOOL
+                else:
+                    t = STRING
+                addr = self.memory.alloc_const(val, t)
+                self.pilaO.append(addr)
+                self.pilaTipos.append(t)
+            elif tag == 'id':
+                name = item[1]
+                vinfo = self._lookup_var(name)
+                if not vinfo:
+                    raise SemanticError(f"Variable '{name}' no declarada")
+                self.pilaO.append(vinfo.addr)
+                self.pilaTipos.append(vinfo.vtype)
+            elif tag == 'bin' or tag == 'rel':
+                _, op, left, right = item
+                work.append(('!bin', op))
+                work.append(right)
+                work.append(left)
+            elif tag == 'un':
+                _, op, arg = item
+                work.append(('!un', op))
+                work.append(arg)
+            elif tag == 'call':
+                self._begin_call(item, work, expect_value if item is node else True)
+            elif tag == '!bin':
+                self._make_binary(item[1])
+            elif tag == '!un':
+                self._make_unary(item[1])
+            elif tag == '!param':
+                _, name, idx, expected_type = item
+                res, t = self.pilaO.pop(), self.pilaTipos.pop()
+                if not self._assign_ok(expected_type, t):
+                    raise SemanticError(f"Tipo de argumento {idx} inválido en llamada a '{name}'")
+                self._emit(('PARAM', res, None, idx))
+            elif tag == '!gosub':
+                self._end_call(item[1], item[2])
             else:
-                t = STRING
-            addr = self.memory.alloc_const(val, t)
-            self.pilaO.append(addr)
-            self.pilaTipos.append(t)
-        elif tag == 'id':
-            name = node[1]
-            vinfo = self._lookup_var(name)
-            if not vinfo:
-                raise SemanticError(f"Variable '{name}' no declarada")
-            self.pilaO.append(vinfo.addr)
-            self.pilaTipos.append(vinfo.vtype)
-        elif tag == 'bin':
-            _, op, left, right = node
-            self._walk_expr(left)
-            self._walk_expr(right)
-            self._make_binary(op)
-        elif tag == 'un':
-            _, op, arg = node
-            self._walk_expr(arg)
-            self._make_unary(op)
-        elif tag == 'rel':
-            _, op, left, right = node
-            self._walk_expr(left)
-            self._walk_expr(right)
-            self._make_binary(op)
-        elif tag == 'call':
-            temp, t = self._emit_call(node, expect_value=True)
-            if temp is None or t is None:
-                raise SemanticError(f"La función '{node[1]}' no regresa valor")
-            self.pilaO.append(temp)
-            self.pilaTipos.append(t)
-        else:
-            raise SemanticError("Tipo de nodo de expresión desconocido")
+                raise SemanticError("Tipo de nodo de expresión desconocido")
+
+    def _begin_call(self, st, work, expect_value):
+        _, name, args = st
+        finfo = self.funcs.get(name)
+        if not finfo:
+            raise SemanticError(f"Función '{name}' no declarada")
+        args = args or []
+        if len(args) != len(finfo.param_types):
+            raise SemanticError(f"Función '{name}' espera {len(finfo.param_types)} params, recibió {len(args)}")
+        self._emit(('ERA', name, None, None))
+        work.append(('!gosub', finfo, expect_value))
+        for idx in range(len(args) - 1, -1, -1):
+            work.append(('!param', name, idx, finfo.param_types[idx]))
+            work.append(args[idx])
+
+    def _end_call(self, finfo, expect_value):
+        target_quad = finfo.start_quad
+        if target_quad is None:
+            # se parchea al final
+            self._pending_gosubs.setdefault(finfo.name, []).append(len(self.cuadruplos))
+        self._emit(('GOSUB', finfo.name, None, target_quad))
+        if not expect_value:
+            return
+        if not finfo.ret_type:
+            raise SemanticError(f"La función '{finfo.name}' no regresa valor")
+        temp = self.new_temp(finfo.ret_type)
+        self._emit(('=', finfo.ret_addr, None, temp))
+        self.pilaO.append(temp)
+        self.pilaTipos.append(finfo.ret_type)
 
     def _make_binary(self, op):
         if len(self.pilaO) < 2:
@@ -515,7 +1074,7 @@ class QuadGenerator(SemanticAnalyzerMin):
         if not res_t:
             raise SemanticError(f"Operación '{op}' no válida para tipos {tl} y {tr}")
         temp = self.new_temp(res_t)
-        self.cuadruplos.append((op, l, r, temp))
+        self._emit((op, l, r, temp))
         self.pilaO.append(temp)
         self.pilaTipos.append(res_t)
 
@@ -527,13 +1086,6 @@ class QuadGenerator(SemanticAnalyzerMin):
         if t not in (ENTERO, FLOTANTE):
             raise SemanticError(f"Operador unario '{op}' no aplica a {t}")
         temp = self.new_temp(t)
-        self.cuadruplos.append((op, operand, None, temp))
+        self._emit((op, operand, None, temp))
         self.pilaO.append(temp)
         self.pilaTipos.append(t)
-
-    def _eval_arg(self, expr):
-        saved = (self.pilaO, self.pilaTipos, self.pilaOp)
-        self.pilaO, self.pilaTipos, self.pilaOp = [], [], []
-        res, t = self._gen_expr(expr)
-        self.pilaO, self.pilaTipos, self.pilaOp = saved
-        return res, t
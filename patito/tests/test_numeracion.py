@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cuadruplos import parse_text
+from semantico import QuadGenerator
+from vm import VirtualMachine
+
+
+def correr(src, cse):
+    gen = QuadGenerator(cse=cse)
+    quads = gen.analyze(parse_text(src))
+    vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, output=io.StringIO())
+    vm.run()
+    return gen, quads, vm.output.getvalue()
+
+
+def comparar(src, salida):
+    gen, quads, con = correr(src, True)
+    sin_gen, sin_quads, sin = correr(src, False)
+    assert con == sin == salida
+    assert sin_gen.cse_reused == 0
+    assert len(sin_quads) - len(quads) == gen.cse_reused
+    return gen, quads
+
+
+def productos(quads):
+    return sum(1 for q in quads if q[0] == '*')
+
+
+def test_reutiliza_subexpresion_repetida():
+    src = ("programa p; vars: x, y, a, b : entero;\n"
+           "inicio x = 3; y = 4; a = x * y + 1; b = y * x - x * y; escribe(a, b); fin")
+    gen, quads = comparar(src, "13\n0\n")
+    # x * y se calcula una vez; y * x es la misma operación (conmutativa)
+    assert gen.cse_reused == 2
+    assert productos(quads) == 1
+
+
+def test_asignar_un_operando_invalida_la_subexpresion():
+    src = ("programa p; vars: x, y, a, b : entero;\n"
+           "inicio x = 3; y = 4; a = x * y; x = 5; b = x * y; escribe(a, b); fin")
+    gen, quads = comparar(src, "12\n20\n")
+    assert gen.cse_reused == 0
+    assert productos(quads) == 2
+
+
+def test_asignar_un_parametro_en_funcion_invalida_la_subexpresion():
+    src = ("programa p; vars: r : entero;\n"
+           "func f(n : entero, m : entero) : entero\n"
+           "vars: a : entero;\n"
+           "  si (n > 0) { a = n * m; n = n + 1; a = a + n * m + n * m; };\n"
+           "  ret a;\nfinf\n"
+           "inicio r = f(2, 3); escribe(r); fin")
+    gen, quads = comparar(src, "24\n")
+    # n * m se recalcula tras 'n = n + 1' y la segunda aparición de después se reutiliza
+    assert gen.cse_reused == 1
+
+
+def test_llamada_invalida_subexpresiones_de_globales():
+    # g cambia x: después de la llamada x * y debe recalcularse
+    src = ("programa p; vars: x, y, a, b : entero;\n"
+           "func g() x = x + 1; finf\n"
+           "inicio x = 3; y = 4; a = x * y; g(); b = x * y; escribe(a, b); fin")
+    gen, quads = comparar(src, "12\n16\n")
+    assert gen.cse_reused == 0
+    assert productos(quads) == 2
@@ -0,0 +1,51 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cuadruplos import parse_text
+from semantico import QuadGenerator, SemanticError
+from vm import VirtualMachine
+
+REDUCCIONES = """programa p;
+vars: i, s, mx, mn, t : entero;
+inicio
+  s = 5; mx = 0; mn = 1000;
+  paralelo (i = 0; i < 200) reduce (suma s, max mx, min mn) haz {
+    t = i * i - 37 * i;
+    s = s + t;
+    si (t > mx) { mx = t; };
+    si (t - 7 < mn) { mn = t - 7; };
+  };
+  escribe(s, mx, mn);
+fin"""
+
+
+def correr(src, jobs):
+    gen = QuadGenerator(jobs=jobs)
+    quads = gen.analyze(parse_text(src))
+    vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, output=io.StringIO(), jobs=jobs)
+    vm.run()
+    return vm.output.getvalue()
+
+
+def test_reducciones_igual_en_secuencia_y_en_paralelo():
+    assert correr(REDUCCIONES, 1) == correr(REDUCCIONES, 2) == "1910405\n32238\n-349\n"
+
+
+@pytest.mark.parametrize("cuerpo", [
+    "m = m - 1;",                        # escritura fuera de la actualización
+    "t = m + i;",                        # lectura
+    "si (i < m) { m = i + 1; };",        # asigna otra expresión
+    "si (i > m) { m = i; };",            # la comparación de max en un min
+    "si (i < m) { m = i; } sino { t = 0; };",
+])
+def test_min_solo_admite_actualizacion_monotona(cuerpo):
+    src = ("programa p; vars: i, m, t : entero;\n"
+           "inicio m = 1000; t = 0; paralelo (i = 0; i < 200) reduce (min m) haz { " + cuerpo + " }; "
+           "escribe(m); fin")
+    with pytest.raises(SemanticError, match="reducción 'min'"):
+        QuadGenerator().analyze(parse_text(src))
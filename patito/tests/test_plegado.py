@@ -0,0 +1,70 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cuadruplos import parse_text
+from semantico import QuadGenerator
+from vm import VirtualMachine
+
+
+def generar(src, **opts):
+    gen = QuadGenerator(**opts)
+    return gen, gen.analyze(parse_text(src))
+
+
+def correr(gen, quads):
+    vm = VirtualMachine(quads, gen.funcs, gen.memory.const_table, output=io.StringIO())
+    vm.run()
+    return vm.output.getvalue()
+
+
+def test_pliega_llamada_pura():
+    src = ("programa p; vars: y : entero;\n"
+           "func doble(x : entero) : entero ret x * 2; finf\n"
+           "inicio y = doble(21); escribe(y); fin")
+    gen, quads = generar(src)
+    assert gen.folded_calls == 1
+    assert not any(q[0] == 'GOSUB' for q in quads)
+    assert correr(gen, quads) == "42\n"
+
+
+def test_no_pliega_resultado_no_finito():
+    # cubo(1e200) se desborda a inf: la llamada se queda y no aparece una constante inf
+    src = ("programa p; vars: y : flotante; c : entero;\n"
+           "func cubo(x : flotante) : flotante ret x * x * x; finf\n"
+           "inicio c = 0; mientras (c < 50) haz { y = cubo(1" + "0" * 200 + ".0); c = c + 1; };"
+           " escribe(y); fin")
+    gen, quads = generar(src)
+    assert gen.folded_calls == 0
+    assert all(val == val and abs(val) != float("inf")
+               for val, _ in gen.memory.const_table if isinstance(val, float))
+    assert correr(gen, quads) == correr(*generar(src, fold_steps=0)) == "inf\n"
+
+
+def test_no_pliega_cero_negativo():
+    # -0.0 == 0.0: como constante se confundiría con la de 0.0
+    src = ("programa p; vars: y : flotante;\n"
+           "func mneg(x : flotante) : flotante ret x * -1.0; finf\n"
+           "inicio y = mneg(0.0); escribe(y); fin")
+    gen, quads = generar(src)
+    assert gen.folded_calls == 0
+    assert correr(gen, quads) == correr(*generar(src, fold_steps=0)) == "-0.0\n"
+
+
+def test_pliega_funcion_que_lee_resultados_ya_plegados():
+    # g(3) se pliega dentro de f; al evaluar f(30) su ciclo se compila en bloques que leen
+    # esa constante nueva
+    src = ("programa p; vars: y : entero;\n"
+           "func g(x : entero) : entero ret x * 7 + 1; finf\n"
+           "func f(n : entero) : entero\n"
+           "vars: i, s : entero;\n"
+           "  si (n > 0) { s = 0; i = 0; mientras (i < n) haz { s = s + g(3) + i; i = i + 1; }; };\n"
+           "  ret s;\nfinf\n"
+           "inicio y = f(30); escribe(y); fin")
+    gen, quads = generar(src)
+    assert gen.folded_calls == 2
+    main = quads[quads[0][3]:]
+    assert not any(q[0] == 'GOSUB' for q in main)
+    assert correr(gen, quads) == correr(*generar(src, fold_steps=0)) == "1095\n"
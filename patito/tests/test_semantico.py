@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cuadruplos import parse_text
+from semantico import QuadGenerator, SemanticError
+
+
+def generar(src, **opts):
+    gen = QuadGenerator(**opts)
+    return gen, gen.analyze(parse_text(src))
+
+
+def recursivas(n):
+    # r_k se llama a sí misma y a r_{k-1}; main llama a todas
+    funcs = []
+    for k in range(n):
+        otra = f" + r{k - 1}(x - 1)" if k else ""
+        funcs.append(f"func r{k}(x : entero) : entero\n"
+                     f"  si (x < 1) {{ ret {k}; }};\n"
+                     f"  ret r{k}(x - 1){otra} + {k};\nfinf")
+    llamadas = " ".join(f"escribe(r{k}(3));" for k in range(n))
+    return "programa rec; vars: a : entero;\n" + "\n".join(funcs) + f"\ninicio {llamadas} fin"
+
+
+def test_generacion_paralela_igual_a_secuencial():
+    src = recursivas(QuadGenerator.PARALLEL_MIN_FUNCS + 8)
+    sec, q_sec = generar(src)
+    par, q_par = generar(src, jobs=2)
+    assert q_par == q_sec
+    assert par.memory.const_table == sec.memory.const_table
+    assert [f.start_quad for f in par.funcs.all()] == [f.start_quad for f in sec.funcs.all()]
+    # las llamadas a sí misma apuntan al inicio de su función
+    starts = {f.name: f.start_quad for f in sec.funcs.all()}
+    assert all(res == starts[l] for op, l, _, res in q_par if op in ('GOSUB', 'TAILCALL'))
+
+
+VIVAS = """func doble(x : entero) : entero ret x * 2; finf
+func usa(x : entero) : entero ret doble(x) + 1; finf
+"""
+MUERTAS = """func par(n : entero) : entero
+  si (n == 0) { ret 1; };
+  ret impar(n - 1);
+finf
+func impar(n : entero) : entero
+  si (n == 0) { ret 0; };
+  ret par(n - 1);
+finf
+func suelta() escribe("nunca"); finf
+"""
+MAIN = "inicio a = usa(4); escribe(a); fin"
+
+
+def test_funciones_inalcanzables_no_generan_cuadruplos():
+    cabeza = "programa m; vars: a : entero;\n"
+    gen, quads = generar(cabeza + VIVAS + MUERTAS + MAIN, fold_steps=0)
+    solo_vivas, esperado = generar(cabeza + VIVAS + MAIN, fold_steps=0)
+    assert set(gen.dead_funcs) == {"par", "impar", "suelta"}
+    assert solo_vivas.dead_funcs == ()
+    assert quads == esperado
+    assert not any(q[1] in gen.dead_funcs for q in quads if q[0] in ('ERA', 'GOSUB', 'TAILCALL'))
+    for name in gen.dead_funcs:
+        finfo = gen.funcs.get(name)
+        assert finfo.start_quad is None and finfo.ret_addr is None
+
+
+def test_estricto_revisa_funciones_inalcanzables():
+    src = ("programa m; vars: a : entero;\n" + VIVAS +
+           "func rota(x : entero) : entero ret x + \"texto\"; finf\n" + MAIN)
+    gen, _ = generar(src)
+    assert gen.dead_funcs == ("rota",)
+    with pytest.raises(SemanticError, match="Operación '\\+' no válida"):
+        generar(src, strict=True)
+    # en modo estricto una función muerta correcta tampoco genera código
+    gen, quads = generar("programa m; vars: a : entero;\n" + VIVAS + MUERTAS + MAIN, strict=True)
+    assert set(gen.dead_funcs) == {"par", "impar", "suelta"}
+    assert all(gen.funcs.get(n).start_quad is None for n in gen.dead_funcs)
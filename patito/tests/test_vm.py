@@ -0,0 +1,160 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cuadruplos import parse_text
+from semantico import QuadGenerator
+from vm import VirtualMachine, Limits, LimitExceeded
+
+
+def generar(src, **opts):
+    gen = QuadGenerator(**opts)
+    return gen, gen.analyze(parse_text(src))
+
+
+def nueva_vm(gen, quads, **opts):
+    return VirtualMachine(quads, gen.funcs, gen.memory.const_table, output=io.StringIO(), **opts)
+
+
+def correr(src, **opts):
+    vm = nueva_vm(*generar(src), **opts)
+    vm.run()
+    return vm.output.getvalue()
+
+
+def test_constante_no_finita_en_bloque_compilado():
+    # el literal se desborda a inf; el ciclo repite el bloque hasta que se compila
+    src = ("programa inf; vars: x, y : flotante; c : entero;\n"
+           "inicio c = 0; mientras (c < 50) haz { x = " + "9" * 400 + ".0 * 2; y = -x; c = c + 1; };"
+           " escribe(x, y); fin")
+    assert correr(src, blocks=True) == correr(src, blocks=False) == "inf\n-inf\n"
+
+
+CUENTA = """programa t; vars: r : entero;
+func cuenta(n : entero, acc : entero) : entero
+  si (n == 0) { ret acc; };
+  ret cuenta(n - 1, acc + 2);
+finf
+inicio r = cuenta(100000, 0); escribe(r); fin"""
+
+
+@pytest.mark.parametrize("blocks", [True, False])
+def test_recursion_de_cola_profunda_no_crece_la_pila(blocks):
+    gen, quads = generar(CUENTA)
+    assert any(q[0] == 'TAILCALL' for q in quads)
+    vm = nueva_vm(gen, quads, blocks=blocks, limits=Limits(depth=10))
+    vm.run()
+    assert vm.output.getvalue() == "200000\n"
+    assert vm.max_depth <= 10
+
+
+def test_sin_llamadas_de_cola_la_misma_recursion_excede_la_profundidad():
+    gen, quads = generar(CUENTA, tail_calls=False)
+    assert not any(q[0] == 'TAILCALL' for q in quads)
+    with pytest.raises(LimitExceeded) as info:
+        nueva_vm(gen, quads, blocks=True, limits=Limits(depth=10)).run()
+    assert info.value.kind == "profundidad"
+
+
+def test_llamada_que_no_es_de_cola_no_se_reescribe():
+    # el resultado de fact(n - 1) todavía se multiplica: no es la última operación
+    src = ("programa t; vars: r : entero;\n"
+           "func fact(n : entero) : entero\n"
+           "  si (n <= 1) { ret 1; };\n"
+           "  ret n * fact(n - 1);\nfinf\n"
+           "inicio r = fact(10); escribe(r); fin")
+    gen, quads = generar(src, fold_steps=0)
+    assert not any(q[0] == 'TAILCALL' for q in quads)
+    assert any(q[0] == 'GOSUB' and q[1] == 'fact' for q in quads)
+    assert correr(src) == "3628800\n"
+
+
+FIBO = """programa s; vars: i, r : entero; x : flotante;
+func fib(n : entero) : entero
+vars: a : entero;
+  si (n <= 1) { ret n; };
+  a = fib(n - 1);
+  escribe(a);
+  ret a + fib(n - 2);
+finf
+inicio
+  i = 0; x = 0.5;
+  mientras (i < 20) haz { x = x * 1.5; i = i + 1; };
+  r = fib(12);
+  escribe(r, x);
+fin"""
+
+
+@pytest.mark.parametrize("origen", [True, False])
+@pytest.mark.parametrize("destino", [True, False])
+def test_snapshot_a_media_llamada_continua_igual(tmp_path, origen, destino):
+    gen, quads = generar(FIBO)
+    completo = nueva_vm(gen, quads, blocks=origen)
+    completo.run()
+    vm = nueva_vm(gen, quads, blocks=origen)
+    # se detiene ya dentro de la recursión, con marcos vivos y una llamada a medio preparar
+    while len(vm.call_stack) < 4 or vm.pending_frame is None:
+        assert vm.step(1)
+    path = tmp_path / "vm.snap"
+    vm.snapshot(path)
+    antes = vm.output.getvalue()
+    restaurada = VirtualMachine.restore(path, quads, gen.funcs, gen.memory.const_table,
+                                        output=io.StringIO(), blocks=destino)
+    assert len(restaurada.call_stack) == len(vm.call_stack)
+    restaurada.run()
+    assert antes + restaurada.output.getvalue() == completo.output.getvalue()
+    assert restaurada.steps == completo.steps
+
+
+AQUI = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HONDO = """programa h; vars: r : entero;
+func baja(n : entero) : entero
+vars: a, b : entero;
+  si (n <= 0) { ret 0; };
+  ret 1 + baja(n - 1);
+finf
+inicio r = baja(5000); escribe(r); fin"""
+CAMPOS = {"pasos": "steps", "profundidad": "depth", "memoria": "slots"}
+PRESUPUESTOS = [
+    # (límite, opción, programa)
+    ("pasos", "--max-pasos=5000",
+     "programa c; vars: i : entero;\ninicio i = 0; escribe(1); mientras (i >= 0) haz { i = i + 1; }; fin"),
+    ("profundidad", "--max-profundidad=100", HONDO),
+    ("memoria", "--max-slots=200", HONDO),
+]
+
+
+@pytest.mark.parametrize("kind, opcion, src", PRESUPUESTOS)
+def test_presupuesto_excedido_detiene_la_vm(kind, opcion, src):
+    valor = int(opcion.split("=")[1])
+    limits = Limits(**{CAMPOS[kind]: valor})
+    gen, quads = generar(src, fold_steps=0)
+    with pytest.raises(LimitExceeded) as info:
+        nueva_vm(gen, quads, blocks=True, limits=limits).run()
+    e = info.value
+    assert (e.kind, e.limit) == (kind, valor)
+    if kind == "pasos":
+        assert e.steps >= valor and e.output == "1\n"
+    elif kind == "profundidad":
+        # se corta antes de abrir el marco que pasaría del límite
+        assert e.depth == valor
+    else:
+        assert 0 < e.slots <= valor
+
+
+@pytest.mark.parametrize("kind, opcion, src", PRESUPUESTOS)
+def test_presupuesto_excedido_sale_con_codigo_2(tmp_path, kind, opcion, src):
+    fuente = tmp_path / "p.pato"
+    fuente.write_text(src, encoding="utf-8")
+    proc = subprocess.run([sys.executable, "run_cuadruplos.py", "-q", "--run", "--plegado=0", opcion, str(fuente)],
+                          cwd=AQUI, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 2
+    assert f"Ejecución detenida: Límite de {kind} excedido ({opcion.split('=')[1]})" in proc.stderr
+    assert "cuadruplos ejecutados:" in proc.stderr
+    assert "detenido en el cuadruplo" in proc.stderr
+    assert ("slots vivos:" in proc.stderr) == (kind == "memoria")
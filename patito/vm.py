@@ -1,12 +1,24 @@
+import hashlib
+import io
+import marshal
+import math
+import operator
+import os
+import signal
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional
 
+from cfg import leaders
+from inicializacion import quad_uses
 from semantico import VirtualMemory, SemanticError
 
 
 def _segment_map():
     ranges = []
-    span = 1000
+    span = VirtualMemory.SPAN
     for seg, types in VirtualMemory.BASES.items():
         for vtype, base in types.items():
             ranges.append((base, base + span, seg, vtype))
@@ -19,11 +31,120 @@ class Frame:
     ret_ip: Optional[int] = None
     locals: dict = field(default_factory=dict)
     temps: dict = field(default_factory=dict)
+    # tras un TAILCALL: slot donde RET deja el valor (el que espera quien hizo la llamada original)
+    ret_slot: Optional[int] = None
+
+    def dump(self):
+        return (self.func, self.ret_ip, self.locals, self.temps, self.ret_slot)
+
+    @classmethod
+    def load(cls, data):
+        return cls(*data)
+
+
+SNAPSHOT_VERSION = 2
+
+_MISSING = object()
+
+
+@dataclass
+class Limits:
+    """Presupuestos para programas no confiables; None = sin límite."""
+    steps: Optional[int] = None    # cuádruplos ejecutados (se revisa por bloque o por vuelta)
+    depth: Optional[int] = None    # llamadas anidadas en la pila
+    slots: Optional[int] = None    # locales y temporales de todos los marcos de función vivos
+
+
+class LimitExceeded(SemanticError):
+    """La VM se detuvo limpiamente al agotar un presupuesto; conserva el estado y la salida parcial."""
+
+    def __init__(self, msg, kind, limit, ip, linea, steps, depth, slots, output):
+        super().__init__(msg)
+        self.kind = kind
+        self.limit = limit
+        self.ip = ip
+        self.linea = linea
+        self.steps = steps
+        self.depth = depth
+        self.slots = slots
+        self.output = output     # lo escrito hasta el corte, si la salida era un StringIO
+
+
+class Trap(Exception):
+    """Detiene la VM en un breakpoint (antes del cuádruplo) o un watchpoint (después de escribir).
+
+    `ip` es donde se reanuda; `executed` indica si el cuádruplo que disparó ya se ejecutó.
+    """
+
+    def __init__(self, kind, ip, addr=None, old=None, new=None, executed=False):
+        super().__init__(kind, ip)
+        self.kind = kind
+        self.ip = ip
+        self.addr = addr
+        self.old = old
+        self.new = new
+        self.executed = executed
+
+
+def program_fingerprint(cuadruplos):
+    return hashlib.sha256(marshal.dumps(list(cuadruplos))).hexdigest()
+
+
+_par_vm = None
+
+def _init_par_worker(cuadruplos, func_dir, const_table, blocks):
+    global _par_vm
+    # jobs=1: dentro del worker un PAR se ejecuta en secuencia
+    _par_vm = VirtualMachine(cuadruplos, func_dir, const_table, blocks=blocks)
+
+def _run_par_chunk(task):
+    """Corre las iteraciones [lo, hi) de un ciclo paralelo sobre una copia de la memoria."""
+    start, end, idx, bound, lo, hi, reductions, privates, global_mem, frame = task
+    vm = _par_vm
+    vm.global_mem = global_mem
+    vm.current_frame = Frame.load(frame)
+    vm.call_stack, vm.pending_frame = [], None
+    vm.steps = vm.max_depth = 0
+    vm.output = io.StringIO()
+    vm._write(idx, lo)
+    vm._write(bound, hi)
+    for op, addr in reductions:
+        if op == "suma":
+            vm._write(addr, type(vm._read(addr))(0))
+    # las privadas se borran: al final solo quedan las que este tramo asignó
+    for addr in privates:
+        vm._target_mem(addr).pop(addr, None)
+    vm.ip = start
+    vm._execute(None, end)
+    assigned = {}
+    for addr in privates:
+        mem = vm._target_mem(addr)
+        if addr in mem:
+            assigned[addr] = mem[addr]
+    return ([vm._read(addr) for _, addr in reductions], assigned,
+            vm.output.getvalue(), vm.steps, vm.max_depth)
 
 
 class VirtualMachine:
-    def __init__(self, cuadruplos, func_dir, const_table):
+    # cuádruplos por vuelta del ciclo interno antes de atender snapshots pedidos por señal
+    QUANTUM = 10_000
+    HOT_BLOCK = 8      # veces que un bloque se interpreta antes de compilarlo
+    PAR_MIN_ITERS = 64  # ciclos 'paralelo' más cortos se corren en secuencia
+
+    def __init__(self, cuadruplos, func_dir, const_table, output=None, unchecked=False, blocks=False,
+                 jobs=1, lines=None, limits=None):
         self.cuadruplos = cuadruplos
+        self.output = output
+        # lines: línea del fuente de cada cuádruplo (QuadGenerator.lineas), para ubicar errores
+        self.lines = lines
+        # jobs > 1: los ciclos 'paralelo' se reparten en un pool de procesos (0 = todos los núcleos)
+        self.jobs = jobs or os.cpu_count() or 1
+        self._const_table = const_table
+        self._pool = None
+        self._extra_steps = 0   # cuádruplos ejecutados por los workers de PAR
+        # unchecked: el análisis de inicialización probó que toda lectura tiene valor
+        if unchecked:
+            self._read = self._read_unchecked
         self.func_dir = func_dir
         self.const_mem = {addr: val for (val, _), addr in const_table.items()}
         self.global_mem = {}
@@ -31,86 +152,563 @@ class VirtualMachine:
         self.pending_frame: Optional[Frame] = None
         self.current_frame = Frame("global")
         self.ip = 0
+        self.steps = 0
+        self.max_depth = 0
         self._ranges = _segment_map()
+        self.checkpoint_path = None
+        self.checkpoint_every = None
+        # steps en el que toca el siguiente snapshot (-1 = ninguno); acota la vuelta del ciclo interno
+        self._next_checkpoint = -1
+        # presupuestos: los pasos acotan la vuelta del ciclo interno, la profundidad se revisa
+        # solo al alcanzar un máximo nuevo y los slots, si se piden, con handlers de llamada
+        # que llevan la cuenta (sin límite de slots el ciclo no paga nada)
+        self.limits = limits or Limits()
+        self._live_slots = 0
+        if self.limits.slots is not None:
+            self._count_slots()
+        self._code = [self._decode(q) for q in cuadruplos]
+        # motor por bloques: cada bloque básico se compila la primera vez que se alcanza
+        self.use_blocks = blocks
+        # fin del bloque que contiene cada ip: tras step(n) o un Trap se puede reanudar a media
+        # cuadra de un bloque, y de ahí a su fin sigue siendo código en línea recta
+        self._ends = [0] * len(cuadruplos)
+        self._leaders = leaders(cuadruplos, func_dir)
+        for a, b in zip(self._leaders, self._leaders[1:] + [len(cuadruplos)]):
+            self._ends[a:b] = [b] * (b - a)
+        self._blocks = [None] * len(cuadruplos)
+        self._hits = [0] * len(cuadruplos)
+        self._block_ips = {}
+        # depuración: se parchan entradas de _code, así el ciclo interno no revisa nada
+        self.breakpoints = set()
+        self.watchpoints = set()
+        self.last_trap = None
+        self._patched = {}        # ip -> entrada decodificada original
+        self._tail_slots = {q[2] for q in cuadruplos if q[0] == "TAILCALL" and q[2] is not None}
+        self._resume_ip = None    # breakpoint que se deja pasar una vez al reanudar
+
+    def enable_checkpoints(self, path, every=None, signum=getattr(signal, "SIGUSR1", None)):
+        """Guarda snapshots en `path` cada `every` cuádruplos y/o al recibir `signum`."""
+        self.checkpoint_path = path
+        self.checkpoint_every = every
+        self._next_checkpoint = self.steps + every if every else -1
+        if signum is not None:
+            signal.signal(signum, self._request_checkpoint)
+
+    def _request_checkpoint(self, signum=None, frame=None):
+        # se atiende en la siguiente frontera de cuádruplo tras la vuelta actual del ciclo interno
+        self._next_checkpoint = self.steps
+
+    def _checkpoint(self):
+        self.snapshot(self.checkpoint_path)
+        self._next_checkpoint = self.steps + self.checkpoint_every if self.checkpoint_every else -1
+
+    def snapshot(self, path):
+        """Escribe el estado completo de la VM (entre dos cuádruplos) de forma atómica."""
+        state = (
+            SNAPSHOT_VERSION,
+            program_fingerprint(self.cuadruplos),
+            self.ip,
+            self.steps,
+            self.max_depth,
+            self.const_mem,
+            self.global_mem,
+            [f.dump() for f in self.call_stack],
+            self.current_frame.dump(),
+            self.pending_frame.dump() if self.pending_frame else None,
+        )
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(marshal.dumps(state)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def restore(cls, path, cuadruplos, func_dir, const_table, **kw):
+        """Crea una VM lista para continuar desde el snapshot `path` con `run()`."""
+        with open(path, "rb") as f:
+            state = marshal.loads(zlib.decompress(f.read()))
+        version, fingerprint, ip, steps, max_depth, const_mem, global_mem, stack, current, pending = state
+        if version != SNAPSHOT_VERSION:
+            raise SemanticError(f"Versión de snapshot no soportada: {version}")
+        if fingerprint != program_fingerprint(cuadruplos):
+            raise SemanticError("El snapshot corresponde a otro programa")
+        vm = cls(cuadruplos, func_dir, const_table, **kw)
+        vm.ip, vm.steps, vm.max_depth = ip, steps, max_depth
+        vm.const_mem = const_mem
+        vm.global_mem = global_mem
+        vm.call_stack = [Frame.load(d) for d in stack]
+        vm.current_frame = Frame.load(current)
+        vm.pending_frame = Frame.load(pending) if pending else None
+        if vm.limits.slots is not None:
+            vm._live_slots = sum(vm._frame_slots.get(f.func, 0) for f in vm.call_stack + [vm.current_frame])
+        return vm
+
+    @property
+    def finished(self):
+        return self.ip >= len(self._code)
 
     def run(self):
-        while self.ip < len(self.cuadruplos):
-            op, l, r, res = self.cuadruplos[self.ip]
-            if op in {"+", "-", "*", "/"}:
-                a, b = self._read(l), self._read(r)
-                if op == "+": out = a + b
-                elif op == "-": out = a - b
-                elif op == "*": out = a * b
-                else: out = a / b
-                self._write(res, out)
-            elif op in {"<", ">", "<=", ">=", "==", "!="}:
-                a, b = self._read(l), self._read(r)
-                if op == "<": out = a < b
-                elif op == ">": out = a > b
-                elif op == "<=": out = a <= b
-                elif op == ">=": out = a >= b
-                elif op == "==": out = a == b
-                else: out = a != b
-                self._write(res, out)
+        try:
+            self._execute(None)
+        finally:
+            self.close()
+
+    def close(self):
+        """Cierra el pool de procesos de los ciclos 'paralelo', si se llegó a crear."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def step(self, n=1):
+        """Ejecuta a lo más n cuádruplos y conserva el estado; regresa True si el programa sigue vivo."""
+        self._execute(self.steps + n)
+        return not self.finished
+
+    def run_iter(self, quantum=1000):
+        """Generador: ejecuta `quantum` cuádruplos por vuelta y cede el control entre vueltas."""
+        while self.step(quantum):
+            yield self.steps
+
+    def _execute(self, limit, end=None):
+        # end: ip en el que se detiene (un worker de PAR para al final del ciclo)
+        code = self._code
+        if end is None:
+            end = len(code)
+        self.last_trap = None
+        while self.ip != end:
+            if 0 <= self._next_checkpoint <= self.steps:
+                self._checkpoint()
+            if limit is not None and self.steps >= limit:
+                return
+            budget = self.limits.steps
+            if budget is not None and self.steps >= budget:
+                raise self._limit_exceeded("pasos", budget, self.ip)
+            # ciclo interno con ip/steps locales; cada QUANTUM se vuelve aquí a atender
+            # snapshots pedidos por señal
+            stop = self.steps + self.QUANTUM
+            if limit is not None and limit < stop:
+                stop = limit
+            if budget is not None and budget < stop:
+                stop = budget
+            if self.steps < self._next_checkpoint < stop:
+                stop = self._next_checkpoint
+            ip, steps = self.ip, self.steps
+            try:
+                if self.use_blocks and limit is None:
+                    # un despacho por bloque básico; step(n) sigue yendo cuádruplo a cuádruplo
+                    blocks, hits, ends, hot = self._blocks, self._hits, self._ends, self.HOT_BLOCK
+                    while ip != end and steps < stop:
+                        blk = blocks[ip]
+                        if blk is not None:
+                            steps += blk[1]
+                            ip = blk[0](self)
+                            continue
+                        hits[ip] += 1
+                        if hits[ip] >= hot:
+                            self._compile_block(ip)
+                            continue
+                        # bloque frío: se interpreta hasta el siguiente líder
+                        stop_blk = ends[ip]
+                        while ip < stop_blk:
+                            handler, l, r, res = code[ip]
+                            steps += 1
+                            nxt = handler(ip, l, r, res)
+                            if nxt != ip + 1:
+                                ip = nxt
+                                break
+                            ip = nxt
+                else:
+                    while ip != end and steps < stop:
+                        handler, l, r, res = code[ip]
+                        steps += 1
+                        ip = handler(ip, l, r, res)
+            except Trap as trap:
+                ip = trap.ip
+                if not trap.executed:
+                    steps -= 1
+                self.last_trap = trap
+                return
+            except LimitExceeded as e:
+                e.steps = steps + self._extra_steps    # dentro de un handler self.steps va atrasado
+                raise
+            except KeyError as e:
+                if not self.use_blocks:
+                    raise
+                err = SemanticError(f"Acceso a dirección sin valor {e.args[0]}")
+                raise self._located(err, ip, e.__traceback__) from None
+            except SemanticError as e:
+                raise self._located(e, ip, e.__traceback__) from None
+            finally:
+                self.ip, self.steps = ip, steps + self._extra_steps
+                self._extra_steps = 0
+
+    def _located(self, err, ip, tb):
+        # agrega la línea del fuente al error; dentro de un bloque compilado el cuádruplo
+        # exacto sale de la línea del código generado donde ocurrió
+        if self.lines is None or getattr(err, "linea", None):
+            return err
+        while tb is not None:
+            name = tb.tb_frame.f_code.co_filename
+            if name.startswith("<bloque "):
+                ip = self._block_ips[int(name[8:-1])][tb.tb_lineno - 2]
+                break
+            tb = tb.tb_next
+        linea = self.lines[ip] if ip < len(self.lines) else 0
+        if not linea:
+            return err
+        located = SemanticError(f"{err} (línea {linea})")
+        located.linea, located.ip = linea, ip
+        return located
+
+    # -- breakpoints y watchpoints ---------------------------------------------
+    def set_breakpoint(self, ip):
+        """Detiene la ejecución antes del cuádruplo `ip`; la VM queda lista para reanudar."""
+        if not 0 <= ip < len(self._code):
+            raise SemanticError(f"Cuádruplo {ip} fuera de rango")
+        self.breakpoints.add(ip)
+        self._repatch(ip)
+
+    def clear_breakpoint(self, ip):
+        self.breakpoints.discard(ip)
+        self._repatch(ip)
+
+    def watch(self, addr):
+        """Detiene la ejecución después de cualquier cuádruplo que cambie el valor de `addr`.
+
+        Las escrituras hechas por los workers de un ciclo 'paralelo' no se observan.
+        """
+        self._resolve(addr)
+        self.watchpoints.add(addr)
+        for ip in self._writers(addr):
+            self._repatch(ip)
+
+    def unwatch(self, addr):
+        self.watchpoints.discard(addr)
+        for ip in self._writers(addr):
+            self._repatch(ip)
+
+    def _written(self, quad):
+        # direcciones que puede escribir el cuádruplo; tras un TAILCALL cualquier RET con valor
+        # escribe el slot de retorno que heredó su marco
+        out = {quad_uses(quad)[1]}
+        if quad[0] == "RET" and quad[1] is not None:
+            out |= self._tail_slots
+        return out
+
+    def _writers(self, addr):
+        return [ip for ip, q in enumerate(self.cuadruplos) if addr in self._written(q)]
+
+    def _repatch(self, ip):
+        # reconstruye la entrada de `ip` a partir de la original con los parches vigentes
+        entry = self._patched.pop(ip, None) or self._code[ip]
+        original = entry
+        for write in self._written(self.cuadruplos[ip]) & self.watchpoints:
+            entry = self._watch_entry(entry, write)
+        if ip in self.breakpoints:
+            entry = self._break_entry(entry)
+        self._code[ip] = entry
+        lead = self._leaders[bisect_right(self._leaders, ip) - 1]
+        end = self._ends[lead]
+        if entry is not original:
+            self._patched[ip] = original
+        # un bloque con parches nunca se compila (desde ninguna de sus entradas): se interpreta
+        pinned = any(lead <= p < end for p in self._patched)
+        for i in range(lead, end):
+            self._blocks[i] = None
+            self._hits[i] = -(1 << 62) if pinned else 0
+
+    def _break_entry(self, entry):
+        handler, l, r, res = entry
+
+        def trap(ip, l, r, res):
+            if self._resume_ip == ip:
+                self._resume_ip = None
+                return handler(ip, l, r, res)
+            self._resume_ip = ip
+            raise Trap("breakpoint", ip)
+        return (trap, l, r, res)
+
+    def _watch_entry(self, entry, addr):
+        handler, l, r, res = entry
+
+        def watch(ip, l, r, res):
+            mem = self._target_mem(addr)
+            old = mem.get(addr, _MISSING)
+            nxt = handler(ip, l, r, res)
+            new = mem.get(addr, _MISSING)
+            if new is not old and new != old:
+                raise Trap("watch", nxt, addr, None if old is _MISSING else old, new, executed=True)
+            return nxt
+        return (watch, l, r, res)
+
+    # -- bloques precompilados ------------------------------------------------
+    _PYOPS = {"+": "+", "-": "-", "*": "*", "/": "/", "<": "<", ">": ">",
+              "<=": "<=", ">=": ">=", "==": "==", "!=": "!="}
+    _MEMS = {"global": "G", "local": "L", "temp": "T"}
+
+    def _operand(self, addr, env):
+        seg, _ = self._resolve(addr)
+        if seg == "const":
+            value = self.const_mem[addr]
+            if isinstance(value, float) and not math.isfinite(value):
+                # inf/nan no tienen literal en Python: se ligan por nombre en el bloque
+                env[f"k{addr}"] = value
+                return f"k{addr}"
+            return f"({value!r})"
+        return f"{self._MEMS[seg]}[{addr}]"
+
+    def _compile_block(self, start):
+        """Traduce el bloque básico que empieza en `start` a una función de Python.
+
+        Las direcciones se resuelven al compilar (las constantes quedan como literales, salvo
+        inf/nan, que se ligan por nombre) y una lectura sin valor es un KeyError, que _execute
+        convierte en SemanticError.
+        """
+        quads = self.cuadruplos
+        end = self._ends[start]
+        body = ["f = vm.current_frame", "L = f.locals", "T = f.temps", "G = vm.global_mem"]
+        env = {"Frame": Frame, "print": print}
+        era = None
+        tail = f"return {end}"
+        ips = [start] * len(body)    # cuádruplo de cada línea generada (para _located)
+        for i in range(start, end):
+            op, l, r, res = quads[i]
+            if op not in ("GOTO", "GOTOF", "GOSUB", "TAILCALL", "RET", "ENDFUNC", "PAR"):
+                ips.append(i)
+            if op in self._PYOPS and r is None:
+                body.append(f"{self._operand(res, env)} = {'-' if op == '-' else ''}{self._operand(l, env)}")
+            elif op in self._PYOPS:
+                body.append(f"{self._operand(res, env)} = {self._operand(l, env)} {self._PYOPS[op]} {self._operand(r, env)}")
             elif op == "=":
-                self._write(res, self._read(l))
+                body.append(f"{self._operand(res, env)} = {self._operand(l, env)}")
             elif op == "PRINT":
-                print(self._read(l))
+                body.append(f"print({self._operand(l, env)}, file=vm.output)")
+            elif op == "ERA":
+                body.append(f"P = vm.pending_frame = Frame({l!r})")
+                era = self.func_dir.get(l)
+            elif op == "PARAM" and era is not None and res < len(era.params):
+                body.append(f"P.locals[{era.params[res].addr}] = {self._operand(l, env)}")
             elif op == "GOTO":
-                self.ip = res
-                continue
+                tail = f"return {res}"
             elif op == "GOTOF":
-                cond = self._read(l)
-                if not cond:
-                    self.ip = res
-                    continue
-            elif op == "ERA":
-                fname = l
-                self.pending_frame = Frame(fname)
-            elif op == "PARAM":
-                if not self.pending_frame:
-                    raise SemanticError("PARAM sin ERA")
-                finfo = self.func_dir.get(self.pending_frame.func)
-                if not finfo:
-                    raise SemanticError(f"Función '{self.pending_frame.func}' no encontrada en VM")
-                idx = res
-                if idx >= len(finfo.params):
-                    raise SemanticError(f"Índice de parámetro {idx} inválido para '{finfo.name}'")
-                target_addr = finfo.params[idx].addr
-                self._write_frame(self.pending_frame, target_addr, self._read(l))
-            elif op == "GOSUB":
-                fname = l
-                finfo = self.func_dir.get(fname)
-                if not finfo or finfo.start_quad is None:
-                    raise SemanticError(f"Función '{fname}' sin punto de entrada")
-                if not self.pending_frame:
-                    raise SemanticError("GOSUB sin ERA")
-                self.pending_frame.ret_ip = self.ip + 1
-                self.call_stack.append(self.current_frame)
-                self.current_frame = self.pending_frame
-                self.pending_frame = None
-                self.ip = finfo.start_quad
-                continue
-            elif op == "RET":
-                if l is not None and res is not None:
-                    self._write(res, self._read(l))
-                self._return_from_function()
-                continue
-            elif op == "ENDFUNC":
-                self._return_from_function()
-                continue
+                tail = f"return {i + 1} if {self._operand(l, env)} else {res}"
+            elif op in ("GOSUB", "TAILCALL", "RET", "ENDFUNC", "PAR"):
+                env[f"h{i}"] = self._code[i]
+                tail = f"return h{i}[0]({i}, h{i}[1], h{i}[2], h{i}[3])"
             else:
-                raise SemanticError(f"Operador de VM desconocido: {op}")
-            self.ip += 1
+                env[f"h{i}"] = self._code[i]
+                body.append(f"h{i}[0]({i}, h{i}[1], h{i}[2], h{i}[3])")
+        ips.append(end - 1)
+        self._block_ips[start] = ips
+        src = "def _blk(vm):\n" + "".join(f"    {line}\n" for line in body + [tail])
+        exec(compile(src, f"<bloque {start}>", "exec"), env)
+        blk = self._blocks[start] = (env["_blk"], end - start)
+        return blk
+
+    # -- decodificación ------------------------------------------------------
+    def _decode(self, quad):
+        op, l, r, res = quad
+        if op in ("+", "-") and r is None:
+            name = self._UNARY[op]
+        else:
+            name = self._HANDLERS.get(op)
+        if name is None:
+            return (self._op_unknown, op, None, None)
+        return (getattr(self, name), l, r, res)
+
+    def _binary(fn):
+        def handler(self, ip, l, r, res):
+            self._write(res, fn(self._read(l), self._read(r)))
+            return ip + 1
+        return handler
+
+    _op_add = _binary(operator.add)
+    _op_sub = _binary(operator.sub)
+    _op_mul = _binary(operator.mul)
+    _op_div = _binary(operator.truediv)
+    _op_lt = _binary(operator.lt)
+    _op_gt = _binary(operator.gt)
+    _op_le = _binary(operator.le)
+    _op_ge = _binary(operator.ge)
+    _op_eq = _binary(operator.eq)
+    _op_ne = _binary(operator.ne)
+    del _binary
+
+    def _op_neg(self, ip, l, r, res):
+        self._write(res, -self._read(l))
+        return ip + 1
+
+    def _op_assign(self, ip, l, r, res):
+        self._write(res, self._read(l))
+        return ip + 1
+
+    def _op_print(self, ip, l, r, res):
+        print(self._read(l), file=self.output)
+        return ip + 1
+
+    def _op_goto(self, ip, l, r, res):
+        return res
+
+    def _op_gotof(self, ip, l, r, res):
+        return ip + 1 if self._read(l) else res
+
+    def _op_era(self, ip, l, r, res):
+        self.pending_frame = Frame(l)
+        return ip + 1
+
+    def _op_param(self, ip, l, r, res):
+        if not self.pending_frame:
+            raise SemanticError("PARAM sin ERA")
+        finfo = self.func_dir.get(self.pending_frame.func)
+        if not finfo:
+            raise SemanticError(f"Función '{self.pending_frame.func}' no encontrada en VM")
+        if res >= len(finfo.params):
+            raise SemanticError(f"Índice de parámetro {res} inválido para '{finfo.name}'")
+        self._write_frame(self.pending_frame, finfo.params[res].addr, self._read(l))
+        return ip + 1
+
+    def _op_gosub(self, ip, l, r, res):
+        finfo = self.func_dir.get(l)
+        if not finfo or finfo.start_quad is None:
+            raise SemanticError(f"Función '{l}' sin punto de entrada")
+        if not self.pending_frame:
+            raise SemanticError("GOSUB sin ERA")
+        if len(self.call_stack) >= self.max_depth:
+            # solo una llamada más profunda que todas las anteriores puede pasarse del límite
+            depth = self.limits.depth
+            if depth is not None and len(self.call_stack) >= depth:
+                raise self._limit_exceeded("profundidad", depth, ip)
+            self.max_depth = len(self.call_stack) + 1
+        self.pending_frame.ret_ip = ip + 1
+        self.call_stack.append(self.current_frame)
+        self.current_frame = self.pending_frame
+        self.pending_frame = None
+        return finfo.start_quad
+
+    def _op_tailcall(self, ip, l, r, res):
+        # llamada en posición de cola: el marco nuevo reemplaza al actual y regresa directo a
+        # quien llamó a este, así la pila no crece
+        finfo = self.func_dir.get(l)
+        if not finfo or finfo.start_quad is None:
+            raise SemanticError(f"Función '{l}' sin punto de entrada")
+        frame = self.pending_frame
+        if not frame:
+            raise SemanticError("TAILCALL sin ERA")
+        current = self.current_frame
+        frame.ret_ip = current.ret_ip
+        if r is not None:
+            slot = r if current.ret_slot is None else current.ret_slot
+            frame.ret_slot = None if slot == finfo.ret_addr else slot
+        self.current_frame = frame
+        self.pending_frame = None
+        return finfo.start_quad
+
+    def _op_ret(self, ip, l, r, res):
+        if l is not None and res is not None:
+            slot = self.current_frame.ret_slot
+            self._write(res if slot is None else slot, self._read(l))
+        return self._return_from_function()
+
+    def _op_endfunc(self, ip, l, r, res):
+        return self._return_from_function()
+
+    def _op_par(self, ip, l, r, res):
+        # Sin pool (o con pocas vueltas) se sigue de largo y el ciclo corre aquí en secuencia.
+        (idx, bound), (reductions, privates) = l, r
+        lo, hi = self._read(idx), self._read(bound)
+        if self.jobs <= 1 or hi - lo < self.PAR_MIN_ITERS:
+            return ip + 1
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=_init_par_worker,
+                initargs=(self.cuadruplos, self.func_dir, self._const_table, self.use_blocks))
+        n = min(self.jobs * 4, hi - lo)
+        cuts = [lo + (hi - lo) * k // n for k in range(n + 1)]
+        frame = self.current_frame.dump()
+        tasks = [(ip + 1, res, idx, bound, a, b, reductions, privates, self.global_mem, frame)
+                 for a, b in zip(cuts, cuts[1:])]
+        results = list(self._pool.map(_run_par_chunk, tasks))
+        # se combinan en orden de tramo: la salida y las privadas quedan como en secuencia
+        for k, (op, addr) in enumerate(reductions):
+            acc = self._read(addr)
+            for values, *_ in results:
+                v = values[k]
+                if op == "suma":
+                    acc = acc + v
+                elif op == "min":
+                    acc = v if v < acc else acc
+                else:
+                    acc = v if v > acc else acc
+            self._write(addr, acc)
+        depth = len(self.call_stack)
+        for _, assigned, out, steps, max_depth in results:
+            for addr, v in assigned.items():
+                self._write(addr, v)
+            if out:
+                print(out, end="", file=self.output)
+            self._extra_steps += steps
+            self.max_depth = max(self.max_depth, depth + max_depth)
+        self._write(idx, hi)
+        return res
+
+    def _op_unknown(self, ip, op, r, res):
+        raise SemanticError(f"Operador de VM desconocido: {op}")
+
+    _HANDLERS = {
+        "+": "_op_add", "-": "_op_sub", "*": "_op_mul", "/": "_op_div",
+        "<": "_op_lt", ">": "_op_gt", "<=": "_op_le", ">=": "_op_ge", "==": "_op_eq", "!=": "_op_ne",
+        "=": "_op_assign", "PRINT": "_op_print", "GOTO": "_op_goto", "GOTOF": "_op_gotof",
+        "ERA": "_op_era", "PARAM": "_op_param", "GOSUB": "_op_gosub", "TAILCALL": "_op_tailcall",
+        "RET": "_op_ret", "ENDFUNC": "_op_endfunc", "PAR": "_op_par",
+    }
+    _UNARY = {"+": "_op_assign", "-": "_op_neg"}
+
+    def _count_slots(self):
+        # tamaño estático de cada marco; las llamadas y regresos llevan la suma de los vivos
+        self._frame_slots = {f.name: sum(f.locals_count.values()) + sum(f.temps_count.values())
+                             for f in self.func_dir.all()}
+        sizes, limit = self._frame_slots, self.limits.slots
+        gosub, tailcall = self._op_gosub, self._op_tailcall
+        ret, endfunc = self._op_ret, self._op_endfunc
+
+        def counted_gosub(ip, l, r, res):
+            live = self._live_slots + sizes.get(l, 0)
+            if live > limit:
+                raise self._limit_exceeded("memoria", limit, ip)
+            nxt = gosub(ip, l, r, res)
+            self._live_slots = live
+            return nxt
+
+        def counted_tailcall(ip, l, r, res):
+            live = self._live_slots + sizes.get(l, 0) - sizes.get(self.current_frame.func, 0)
+            if live > limit:
+                raise self._limit_exceeded("memoria", limit, ip)
+            nxt = tailcall(ip, l, r, res)
+            self._live_slots = live
+            return nxt
+
+        def returning(handler):
+            def counted(ip, l, r, res):
+                self._live_slots -= sizes.get(self.current_frame.func, 0)
+                return handler(ip, l, r, res)
+            return counted
+
+        self._op_gosub, self._op_tailcall = counted_gosub, counted_tailcall
+        self._op_ret, self._op_endfunc = returning(ret), returning(endfunc)
+
+    def _limit_exceeded(self, kind, limit, ip):
+        linea = self.lines[ip] if self.lines is not None and ip < len(self.lines) else 0
+        msg = f"Límite de {kind} excedido ({limit})" + (f" (línea {linea})" if linea else "")
+        output = self.output.getvalue() if isinstance(self.output, io.StringIO) else None
+        slots = self._live_slots if self.limits.slots is not None else None
+        return LimitExceeded(msg, kind, limit, ip, linea, self.steps, len(self.call_stack), slots, output)
 
     def _return_from_function(self):
         if not self.call_stack:
-            self.ip = len(self.cuadruplos)
-            return
+            return len(self._code)
         caller = self.call_stack.pop()
         ret_ip = self.current_frame.ret_ip
         self.current_frame = caller
-        self.ip = ret_ip if ret_ip is not None else len(self.cuadruplos)
+        return ret_ip if ret_ip is not None else len(self._code)
 
     def _resolve(self, addr):
         for start, end, seg, vtype in self._ranges:
@@ -137,6 +735,9 @@ class VirtualMachine:
             raise SemanticError(f"Acceso a dirección sin valor {addr}")
         return mem[addr]
 
+    def _read_unchecked(self, addr):
+        return self._target_mem(addr)[addr]
+
     def _write(self, addr, value):
         mem = self._target_mem(addr)
         mem[addr] = value